@@ -2,13 +2,47 @@
 
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List
+from datetime import date
 from models import RepairLogCreate, RepairLogDB, RepairLogUpdate
-from database import get_connection
-from auth_utils import role_required, get_current_user
+from database import get_connection, fan_out
+from tenancy import school_of_shard
+import queries
+from auth_utils import role_required, get_current_user, district_admin_required
 import mysql.connector
 
 router = APIRouter(prefix="/analytics", tags=["History, Analytics & Maintenance"])
 
+queries.register("analytics.top_requested", """
+    SELECT E.name AS equipment_name, SUM(R.quantity) AS total_units_borrowed
+    FROM lending_requests R JOIN equipment E ON R.equipment_id = E.equipment_id
+    GROUP BY E.equipment_id, E.name ORDER BY total_units_borrowed DESC LIMIT 5
+""")
+queries.register("analytics.average_duration", """
+    SELECT E.name AS equipment_name, AVG(DATEDIFF(R.return_date, R.borrow_date)) AS avg_loan_duration_days
+    FROM lending_requests R JOIN equipment E ON R.equipment_id = E.equipment_id
+    WHERE R.status = 'Returned' AND R.borrow_date IS NOT NULL AND R.return_date IS NOT NULL
+    GROUP BY E.name ORDER BY avg_loan_duration_days DESC
+""")
+queries.register("analytics.units_by_equipment_name", """
+    SELECT E.name AS equipment_name, SUM(R.quantity) AS total_units_borrowed
+    FROM lending_requests R JOIN equipment E ON R.equipment_id = E.equipment_id
+    GROUP BY E.name
+""")
+queries.register("analytics.loan_days_by_equipment_name", """
+    SELECT E.name AS equipment_name,
+           SUM(DATEDIFF(R.return_date, R.borrow_date)) AS total_days, COUNT(*) AS loans
+    FROM lending_requests R JOIN equipment E ON R.equipment_id = E.equipment_id
+    WHERE R.status = 'Returned' AND R.borrow_date IS NOT NULL AND R.return_date IS NOT NULL
+    GROUP BY E.name
+""")
+queries.register("analytics.requests_by_status", "SELECT status, COUNT(*) AS total FROM lending_requests GROUP BY status")
+queries.register("repair_log.insert",
+                 "INSERT INTO repair_log (equipment_id, damage_description, reported_by_user_id, report_date) "
+                 "VALUES (%s, %s, %s, CURDATE())")
+queries.register("repair_log.complete",
+                 "UPDATE repair_log SET repair_cost = %s, repaired_by = %s, repair_date = CURDATE() "
+                 "WHERE log_id = %s AND repair_date IS NULL")
+
 # --- Request History and Usage Analytics ---
 @router.get("/usage/top-requested")
 def get_top_requested(current_user: dict = Depends(role_required(["Admin"]))):
@@ -16,16 +50,9 @@ def get_top_requested(current_user: dict = Depends(role_required(["Admin"]))):
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
-        query = """
-        SELECT E.name AS equipment_name, SUM(R.quantity) AS total_units_borrowed
-        FROM lending_requests R JOIN equipment E ON R.equipment_id = E.equipment_id
-        GROUP BY E.equipment_id, E.name ORDER BY total_units_borrowed DESC LIMIT 5;
-        """
-        cur.execute(query)
-        return cur.fetchall()
+        return queries.fetch_all(conn, "analytics.top_requested")
     finally:
-        if conn: cur.close(); conn.close()
+        if conn: conn.close()
 
 @router.get("/usage/average-duration")
 def get_average_duration(current_user: dict = Depends(role_required(["Admin"]))):
@@ -33,17 +60,49 @@ def get_average_duration(current_user: dict = Depends(role_required(["Admin"])))
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
-        query = """
-        SELECT E.name AS equipment_name, AVG(DATEDIFF(R.return_date, R.borrow_date)) AS avg_loan_duration_days
-        FROM lending_requests R JOIN equipment E ON R.equipment_id = E.equipment_id
-        WHERE R.status = 'Returned' AND R.borrow_date IS NOT NULL AND R.return_date IS NOT NULL
-        GROUP BY E.name ORDER BY avg_loan_duration_days DESC;
-        """
-        cur.execute(query)
-        return cur.fetchall()
+        return queries.fetch_all(conn, "analytics.average_duration")
     finally:
-        if conn: cur.close(); conn.close()
+        if conn: conn.close()
+
+
+# --- District-wide Analytics (all school shards, queried concurrently; district Admins only) ---
+
+def _fetch_all(name: str):
+    return lambda conn: queries.fetch_all(conn, name)
+
+@router.get("/district/usage/top-requested")
+def get_district_top_requested(current_user: dict = Depends(district_admin_required)):
+    """District analytics: Top 5 equipment by units borrowed, summed across all schools."""
+    per_shard = fan_out(_fetch_all("analytics.units_by_equipment_name"))
+    totals = {}
+    for rows in per_shard.values():
+        for row in rows:
+            totals[row["equipment_name"]] = totals.get(row["equipment_name"], 0) + int(row["total_units_borrowed"])
+    top = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:5]
+    return [{"equipment_name": name, "total_units_borrowed": units} for name, units in top]
+
+@router.get("/district/usage/average-duration")
+def get_district_average_duration(current_user: dict = Depends(district_admin_required)):
+    """District analytics: Average loan duration per equipment name across all schools."""
+    # Sums and counts (not per-school averages) so the merged average is weighted correctly
+    per_shard = fan_out(_fetch_all("analytics.loan_days_by_equipment_name"))
+    merged = {}
+    for rows in per_shard.values():
+        for row in rows:
+            days, loans = merged.get(row["equipment_name"], (0, 0))
+            merged[row["equipment_name"]] = (days + int(row["total_days"]), loans + int(row["loans"]))
+    result = [{"equipment_name": name, "avg_loan_duration_days": days / loans}
+              for name, (days, loans) in merged.items() if loans]
+    return sorted(result, key=lambda row: row["avg_loan_duration_days"], reverse=True)
+
+@router.get("/district/requests-by-school")
+def get_district_requests_by_school(current_user: dict = Depends(district_admin_required)):
+    """District analytics: Request counts per status for every school."""
+    per_shard = fan_out(_fetch_all("analytics.requests_by_status"))
+    schools = school_of_shard()
+    per_school = {schools[shard]: rows for shard, rows in per_shard.items()}
+    return [{"school_id": school_id, "counts": {row["status"]: int(row["total"]) for row in rows}}
+            for school_id, rows in sorted(per_school.items())]
 
 
 # --- Damage/Repair Log for equipment maintenance ---
@@ -54,15 +113,12 @@ def log_damage(log_data: RepairLogCreate, current_user: dict = Depends(get_curre
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor()
-        insert_query = "INSERT INTO repair_log (equipment_id, damage_description, reported_by_user_id, report_date) VALUES (%s, %s, %s, CURDATE())"
         params = (log_data.equipment_id, log_data.damage_description, current_user['user_id'])
-        cur.execute(insert_query, params)
-        log_id = cur.lastrowid
+        log_id = queries.insert(conn, "repair_log.insert", params)
         conn.commit()
         return {"log_id": log_id, "reported_by_user_id": current_user['user_id'], "report_date": date.today(), **log_data.model_dump()}
     finally:
-        if conn: cur.close(); conn.close()
+        if conn: conn.close()
 
 
 @router.put("/repair-log/{log_id}", status_code=status.HTTP_200_OK)
@@ -71,13 +127,11 @@ def complete_repair(log_id: int, update_data: RepairLogUpdate, current_user: dic
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor()
-        update_query = "UPDATE repair_log SET repair_cost = %s, repaired_by = %s, repair_date = CURDATE() WHERE log_id = %s AND repair_date IS NULL"
         params = (update_data.repair_cost, update_data.repaired_by, log_id)
-        cur.execute(update_query, params)
+        updated = queries.execute(conn, "repair_log.complete", params)
         conn.commit()
-        if cur.rowcount == 0:
+        if updated == 0:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Repair log not found or already completed.")
         return {"message": f"Repair log {log_id} marked as completed."}
     finally:
-        if conn: cur.close(); conn.close()
\ No newline at end of file
+        if conn: conn.close()
\ No newline at end of file
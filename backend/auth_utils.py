@@ -47,9 +47,11 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: int = payload.get("user_id")
         role: str = payload.get("role")
+        school_id: Optional[int] = payload.get("school_id")
         if user_id is None or role is None:
             raise JWTError
-        return {"user_id": user_id, "role": role}
+        return {"user_id": user_id, "role": role, "school_id": school_id,
+                "district": bool(payload.get("district"))}
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -66,4 +68,13 @@ def role_required(roles: list):
                 detail=f"Access forbidden. Required role(s): {', '.join(roles)}",
             )
         return user
-    return role_checker
\ No newline at end of file
+    return role_checker
+
+def district_admin_required(user: dict = Depends(get_current_user)):
+    """Dependency for endpoints that read every school: Admins with the `district` claim only."""
+    if user["role"] != "Admin" or not user["district"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access forbidden. Requires a district Admin.",
+        )
+    return user
\ No newline at end of file
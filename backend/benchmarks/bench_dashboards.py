@@ -0,0 +1,67 @@
+# benchmarks/bench_dashboards.py
+
+"""
+Requests, payload bytes and wall time per dashboard load: the calls each
+screen used to make versus its /dashboard/* endpoint.
+
+Needs a running server and a token for each role you want to measure:
+    python benchmarks/bench_dashboards.py --staff-token <JWT> --admin-token <JWT> --student-token <JWT>
+
+Roles without a token are skipped. Each load is repeated --runs times and the
+median wall time is reported.
+"""
+
+import argparse
+import os
+import statistics
+import time
+import urllib.request
+
+# What each screen fetched on load before the aggregated endpoints existed
+LEGACY_LOADS = {
+    "staff": ["/lending/requests?status=Pending", "/equipment/"],
+    "student": ["/equipment/"],
+    "admin": ["/equipment/"],
+}
+
+
+def _get(base_url: str, path: str, token: str) -> int:
+    req = urllib.request.Request(base_url + path, headers={"Authorization": f"Bearer {token}"})
+    with urllib.request.urlopen(req) as resp:
+        return len(resp.read())
+
+
+def measure(base_url: str, paths: list, token: str, runs: int) -> tuple:
+    """Return (request count, payload bytes, median seconds) for loading `paths` in sequence."""
+    timings = []
+    payload = 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        payload = sum(_get(base_url, p, token) for p in paths)
+        timings.append(time.perf_counter() - start)
+    return len(paths), payload, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=os.getenv("API_BASE_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--staff-token", default=os.getenv("STAFF_TOKEN"))
+    parser.add_argument("--student-token", default=os.getenv("STUDENT_TOKEN"))
+    parser.add_argument("--admin-token", default=os.getenv("ADMIN_TOKEN"))
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    tokens = {"staff": args.staff_token, "student": args.student_token, "admin": args.admin_token}
+    print("dashboard | variant    | requests |    bytes | median ms")
+    for name, legacy_paths in LEGACY_LOADS.items():
+        token = tokens[name]
+        if not token:
+            print(f"{name:<9} | skipped (no --{name}-token)")
+            continue
+        for variant, paths in (("legacy", legacy_paths), ("aggregated", [f"/dashboard/{name}"])):
+            count, size, seconds = measure(args.base_url, paths, token, args.runs)
+            print(f"{name:<9} | {variant:<10} | {count:>8} | {size:>8} | {seconds * 1000:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/bench_prepared_statements.py
+
+"""
+Text queries versus the prepared statements of queries.py on the hot paths.
+
+Runs the SQL of the login, request and approve handlers against a real
+database on one connection, first as text queries (parsed by MySQL on every
+execution), then through the registry (prepared once, executed by id with
+binary parameters). Writes are rolled back after every iteration, so the
+database is left unchanged. Only the statements are timed; password hashing
+and HTTP overhead are not included.
+
+Needs the .env (or tenants.json) of a database with at least one user and one
+equipment item; the approve path also needs a Pending request whose
+equipment has enough units available, otherwise it is skipped.
+
+Usage (from backend/):
+    python benchmarks/bench_prepared_statements.py
+    python benchmarks/bench_prepared_statements.py --iterations 5000 --school 2
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import queries  # noqa: E402
+import waitlist  # noqa: E402,F401  (registers the waitlist.* statements)
+from database import get_connection  # noqa: E402
+from tenancy import DEFAULT_SCHOOL_ID  # noqa: E402
+
+
+def build_paths(cur) -> dict:
+    """The (statement name, params) sequence each handler runs, using rows found in the database."""
+    cur.execute("SELECT user_id, username FROM users ORDER BY user_id LIMIT 1")
+    user = cur.fetchone()
+    cur.execute("SELECT equipment_id FROM equipment WHERE total_quantity > 0 ORDER BY equipment_id LIMIT 1")
+    equipment = cur.fetchone()
+    if not user or not equipment:
+        sys.exit("Need at least one user and one equipment item in the database.")
+
+    today = date.today()
+    paths = {
+        "login": [("user.login_by_username", (user["username"],))],
+        # create_lending_request: lock the stock, count Pending units, check the line, insert
+        "request": [
+            ("waitlist.lock_equipment", (equipment["equipment_id"],)),
+            ("waitlist.pending_units", (equipment["equipment_id"],)),
+            ("waitlist.has_waiting", (equipment["equipment_id"],)),
+            ("lending.insert", (equipment["equipment_id"], user["user_id"], datetime.now().replace(microsecond=0),
+                                today + timedelta(days=7), 1, "Pending", 0)),
+        ],
+    }
+
+    cur.execute("""
+        SELECT R.request_id, R.equipment_id, R.quantity FROM lending_requests R
+        JOIN equipment E ON R.equipment_id = E.equipment_id
+        WHERE R.status = 'Pending' AND E.available_quantity >= R.quantity
+        ORDER BY R.request_id LIMIT 1
+    """)
+    pending = cur.fetchone()
+    if pending:
+        paths["approve"] = [
+            ("lending.pending_by_id", (pending["request_id"],)),
+            ("waitlist.lock_equipment", (pending["equipment_id"],)),
+            ("waitlist.pending_units", (pending["equipment_id"],)),
+            ("lending.issue", (user["user_id"], today, pending["request_id"])),
+            ("equipment.take_units", (pending["quantity"], pending["equipment_id"])),
+        ]
+    return paths
+
+
+def _is_select(name: str) -> bool:
+    return queries.QUERIES[name].lstrip().upper().startswith("SELECT")
+
+
+def run_text(conn, statements: list) -> float:
+    start = time.perf_counter()
+    cur = conn.cursor(dictionary=True)
+    for name, params in statements:
+        cur.execute(queries.QUERIES[name], params)
+        if _is_select(name):
+            cur.fetchall()
+    cur.close()
+    elapsed = time.perf_counter() - start
+    conn.rollback()
+    return elapsed
+
+
+def run_prepared(conn, statements: list) -> float:
+    start = time.perf_counter()
+    for name, params in statements:
+        if _is_select(name):
+            queries.fetch_all(conn, name, params)
+        else:
+            queries.execute(conn, name, params)
+    elapsed = time.perf_counter() - start
+    conn.rollback()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000, help="Executions of each path per variant")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--school", type=int, default=DEFAULT_SCHOOL_ID, help="School whose shard to use")
+    args = parser.parse_args()
+
+    conn = get_connection(args.school)
+    try:
+        cur = conn.cursor(dictionary=True)
+        paths = build_paths(cur)
+        cur.close()
+        conn.rollback()
+        if "approve" not in paths:
+            print("approve: skipped (no Pending request with enough units available)")
+
+        print("path    | statements | text us/op | prepared us/op | speedup")
+        for path, statements in paths.items():
+            for _ in range(args.warmup):
+                run_text(conn, statements)
+                run_prepared(conn, statements)
+            text = sum(run_text(conn, statements) for _ in range(args.iterations))
+            prepared = sum(run_prepared(conn, statements) for _ in range(args.iterations))
+            print(f"{path:<7} | {len(statements):>10} | {text / args.iterations * 1e6:>10.1f} | "
+                  f"{prepared / args.iterations * 1e6:>14.1f} | {text / prepared:>6.2f}x")
+    finally:
+        conn.close()
+
+    print("\nprepared statement reuse on this connection:")
+    for stat in queries.query_stats()["statements"]:
+        print(f"  {stat['name']:<24} prepared {stat['prepares']}x, executed {stat['calls']}x, "
+              f"avg {stat['avg_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
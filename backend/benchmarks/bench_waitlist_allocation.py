@@ -0,0 +1,145 @@
+# benchmarks/bench_waitlist_allocation.py
+
+"""
+Latency of `waitlist.allocate()` against a real database.
+
+Creates a scratch equipment item with --waiting waitlisted requests of
+--quantity units each, then measures two cases:
+
+  starved  only --quantity - 1 units are freed, so nothing fits. This is the
+           worst case for the old in-memory planner (it scanned the whole
+           queue under lock); the query's `quantity <= budget` filter should
+           make it a few statements regardless of queue length.
+  drain    --restock units are freed per call until the queue is empty.
+
+Everything the run creates (equipment, requests, their status history) is
+deleted at the end. Point it at a scratch database (e.g. a local shard).
+
+Usage (from backend/):
+    python benchmarks/bench_waitlist_allocation.py
+    python benchmarks/bench_waitlist_allocation.py --waiting 20000 --quantity 2 --restock 10 --school 2
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_connection  # noqa: E402
+from status_history import history_writer  # noqa: E402
+from tenancy import DEFAULT_SCHOOL_ID  # noqa: E402
+from waitlist import allocate  # noqa: E402
+
+
+def setup(school_id: int, waiting: int, quantity: int) -> int:
+    conn = get_connection(school_id)
+    try:
+        cur = conn.cursor(dictionary=True)
+        cur.execute("SELECT user_id FROM users ORDER BY user_id LIMIT 1")
+        user = cur.fetchone()
+        cur.execute("SELECT category_id FROM equipment_category ORDER BY category_id LIMIT 1")
+        category = cur.fetchone()
+        if not user or not category:
+            sys.exit("Need at least one user and one equipment category in the database.")
+
+        cur.execute(
+            "INSERT INTO equipment (name, category_id, total_quantity, available_quantity) VALUES (%s, %s, %s, 0)",
+            (f"bench-waitlist-{os.getpid()}", category["category_id"], quantity))
+        equipment_id = cur.lastrowid
+
+        start = datetime.now().replace(microsecond=0)
+        rows = [(equipment_id, user["user_id"], start + timedelta(seconds=i), date.today() + timedelta(days=7),
+                 quantity, "Waitlisted", 1 if i % 5 == 0 else 0) for i in range(waiting)]
+        for offset in range(0, len(rows), 1000):
+            cur.executemany(
+                """INSERT INTO lending_requests
+                     (equipment_id, requester_id, request_date, expected_return_date, quantity, status, priority)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                rows[offset:offset + 1000])
+        conn.commit()
+        cur.close()
+        return equipment_id
+    finally:
+        conn.close()
+
+
+def free(school_id: int, equipment_id: int, units: int):
+    conn = get_connection(school_id)
+    try:
+        cur = conn.cursor()
+        cur.execute("UPDATE equipment SET available_quantity = available_quantity + %s WHERE equipment_id = %s",
+                    (units, equipment_id))
+        # Promoted requests are Pending and keep their units reserved, like a real approval queue
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+
+
+def cleanup(school_id: int, equipment_id: int):
+    conn = get_connection(school_id)
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM lending_status_history WHERE equipment_id = %s", (equipment_id,))
+        cur.execute("DELETE FROM lending_requests WHERE equipment_id = %s", (equipment_id,))
+        cur.execute("DELETE FROM equipment WHERE equipment_id = %s", (equipment_id,))
+        conn.commit()
+        cur.close()
+    finally:
+        conn.close()
+
+
+def timed_allocate(school_id: int, equipment_id: int) -> tuple:
+    start = time.perf_counter()
+    promoted = allocate([equipment_id], school_id=school_id)
+    return time.perf_counter() - start, len(promoted)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--waiting", type=int, default=10000, help="Waitlisted requests to create")
+    parser.add_argument("--quantity", type=int, default=2, help="Units per waiting request")
+    parser.add_argument("--restock", type=int, default=10, help="Units freed per call in the drain case")
+    parser.add_argument("--starved-runs", type=int, default=50)
+    parser.add_argument("--school", type=int, default=DEFAULT_SCHOOL_ID, help="School whose shard to use")
+    args = parser.parse_args()
+    if args.quantity < 2:
+        parser.error("--quantity must be at least 2 so the starved case has a budget that fits nothing")
+
+    history_writer.start()
+    equipment_id = setup(args.school, args.waiting, args.quantity)
+    try:
+        print(f"{args.waiting} waiting requests of {args.quantity} units on equipment #{equipment_id}")
+
+        free(args.school, equipment_id, args.quantity - 1)
+        timings = []
+        for _ in range(args.starved_runs):
+            seconds, promoted = timed_allocate(args.school, equipment_id)
+            assert promoted == 0
+            timings.append(seconds)
+        print(f"starved: {args.quantity - 1} unit(s) free, median {statistics.median(timings) * 1000:.2f} ms, "
+              f"max {max(timings) * 1000:.2f} ms per allocate()")
+
+        free(args.school, equipment_id, args.restock)
+        timings, total = [], 0
+        while True:
+            seconds, promoted = timed_allocate(args.school, equipment_id)
+            if not promoted:
+                break
+            timings.append(seconds)
+            total += promoted
+            free(args.school, equipment_id, args.restock)
+        if timings:
+            print(f"drain:   {total} promoted in {len(timings)} calls, median {statistics.median(timings) * 1000:.2f} ms "
+                  f"per allocate(), {total / sum(timings):,.0f} requests/s")
+    finally:
+        history_writer.stop()
+        cleanup(args.school, equipment_id)
+
+
+if __name__ == "__main__":
+    main()
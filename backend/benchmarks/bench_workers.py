@@ -0,0 +1,121 @@
+# benchmarks/bench_workers.py
+
+"""
+Throughput scaling of `python main.py --prod` from 1 to N worker processes.
+
+For each worker count the script starts the server on a free port, drives it
+with keep-alive HTTP clients running in separate processes for a fixed time,
+prints requests/second, then sends SIGINT so the server drains and exits.
+
+Usage (from backend/):
+    python benchmarks/bench_workers.py                      # GET /, 1..CPU count workers
+    python benchmarks/bench_workers.py --workers 1 2 4 8 --duration 15
+    python benchmarks/bench_workers.py --path /equipment/ --token <JWT>
+
+GET / touches no database, so it measures the server's own scaling. Pointing
+--path at a DB-backed route also exercises the per-worker connection pools.
+"""
+
+import argparse
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_ready(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start within {timeout}s")
+
+
+def _client(port: int, path: str, token: str, duration: float) -> tuple:
+    """One client process: sequential keep-alive requests until the deadline."""
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    ok = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            conn.request("GET", path, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status < 400:
+                ok += 1
+            else:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.close()
+    return ok, errors
+
+
+def run(workers: int, args) -> tuple:
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "main.py", "--prod", "--workers", str(workers), "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_until_ready(port)
+        with ProcessPoolExecutor(max_workers=args.clients) as pool:
+            futures = [pool.submit(_client, port, args.path, args.token, args.duration)
+                       for _ in range(args.clients)]
+            results = [f.result() for f in futures]
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait(timeout=60)
+
+    ok = sum(r[0] for r in results)
+    errors = sum(r[1] for r in results)
+    return ok / args.duration, errors
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    default_workers = sorted({1, 2, 4, cpus} & set(range(1, cpus + 1)))
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers)
+    parser.add_argument("--clients", type=int, default=cpus * 4, help="Concurrent client processes")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--path", default="/")
+    parser.add_argument("--token", default=os.getenv("BENCH_TOKEN", ""))
+    args = parser.parse_args()
+
+    print(f"GET {args.path}, {args.clients} clients, {args.duration:.0f}s per run")
+    print("workers |      req/s | speedup | errors")
+    baseline = None
+    for n in args.workers:
+        rps, errors = run(n, args)
+        baseline = baseline or rps
+        speedup = rps / baseline if baseline else 0.0
+        print(f"{n:>7} | {rps:>10.1f} | {speedup:>6.2f}x | {errors:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# dashboard_api.py
+
+"""
+One-round-trip views for the frontend dashboards. Each endpoint runs a small,
+fixed set of indexed queries on a single pooled connection and returns
+exactly what its screen renders, already joined with equipment, category and
+borrower names.
+"""
+
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from models import StaffDashboard, StudentDashboard, AdminDashboard
+from database import get_connection
+import queries
+from auth_utils import role_required
+
+router = APIRouter(prefix="/dashboard", tags=["2. Dashboard & Search"])
+
+STATUSES = ("Waitlisted", "Pending", "Approved", "Issued", "Rejected", "Returned")
+
+REQUEST_SELECT = """
+    SELECT
+        R.request_id, R.equipment_id, E.name AS equipment_name,
+        R.requester_id, U.full_name AS requester_name,
+        R.request_date, R.borrow_date, R.expected_return_date, R.quantity, R.status,
+        R.rejection_reason,
+        (R.status = 'Issued' AND R.expected_return_date < CURDATE()) AS is_overdue
+    FROM lending_requests R
+    JOIN equipment E ON R.equipment_id = E.equipment_id
+    JOIN users U ON R.requester_id = U.user_id
+"""
+
+# Index-only scans: (status, ...) and (requester_id, status, ...) cover the count per status
+COUNTS_SELECT = """
+    SELECT status, COUNT(*) AS total
+    FROM lending_requests
+"""
+
+# Range scan on (status, expected_return_date): touches only overdue Issued rows
+OVERDUE_SELECT = """
+    SELECT COUNT(*) AS overdue
+    FROM lending_requests
+    WHERE status = 'Issued' AND expected_return_date < CURDATE()
+"""
+
+EQUIPMENT_SELECT = """
+    SELECT
+        E.equipment_id, E.name, E.category_id, C.category_name,
+        E.total_quantity, E.available_quantity
+    FROM equipment E
+    JOIN equipment_category C ON E.category_id = C.category_id
+"""
+
+queries.register("dashboard.open_requests", REQUEST_SELECT + """
+    WHERE R.status IN ('Waitlisted', 'Pending', 'Approved', 'Issued')
+    ORDER BY R.request_date DESC
+""")
+queries.register("dashboard.status_counts", COUNTS_SELECT + " GROUP BY status")
+queries.register("dashboard.overdue_count", OVERDUE_SELECT)
+
+# Borrowable equipment: one fixed statement per (category filter?, name search?) combination.
+# Out-of-stock items are listed too: requesting them joins the waitlist.
+BORROWABLE_QUERIES = {
+    (False, False): queries.register("dashboard.borrowable_equipment", EQUIPMENT_SELECT + """
+        WHERE E.total_quantity > 0 ORDER BY E.name
+    """),
+    (True, False): queries.register("dashboard.borrowable_equipment_by_category", EQUIPMENT_SELECT + """
+        WHERE E.total_quantity > 0 AND E.category_id = %s ORDER BY E.name
+    """),
+    (False, True): queries.register("dashboard.borrowable_equipment_by_name", EQUIPMENT_SELECT + """
+        WHERE E.total_quantity > 0 AND E.name LIKE %s ORDER BY E.name
+    """),
+    (True, True): queries.register("dashboard.borrowable_equipment_by_category_and_name", EQUIPMENT_SELECT + """
+        WHERE E.total_quantity > 0 AND E.category_id = %s AND E.name LIKE %s ORDER BY E.name
+    """),
+}
+
+queries.register("dashboard.requests_by_requester",
+                 REQUEST_SELECT + " WHERE R.requester_id = %s ORDER BY R.request_date DESC")
+queries.register("dashboard.status_counts_by_requester", COUNTS_SELECT + " WHERE requester_id = %s GROUP BY status")
+queries.register("dashboard.overdue_count_by_requester", OVERDUE_SELECT + " AND requester_id = %s")
+queries.register("dashboard.all_equipment", EQUIPMENT_SELECT + " ORDER BY E.name")
+
+
+def _summarize(rows: list, overdue: dict) -> dict:
+    """Fold `COUNTS_SELECT ... GROUP BY status` rows and the OVERDUE_SELECT row into the response counts."""
+    counts = {s: 0 for s in STATUSES}
+    for row in rows:
+        counts[row["status"]] = int(row["total"])
+    return {"counts": counts, "overdue_count": int(overdue["overdue"]) if overdue else 0}
+
+
+def _requests(rows: list) -> list:
+    for row in rows:
+        row["is_overdue"] = bool(row["is_overdue"])
+    return rows
+
+
+@router.get("/staff", response_model=StaffDashboard)
+def staff_dashboard(current_user: dict = Depends(role_required(["Admin", "Staff"]))):
+    """Open requests (Waitlisted/Pending/Approved/Issued) with names, plus status counts for the caller's school."""
+    conn = None
+    try:
+        conn = get_connection()
+
+        requests = _requests(queries.fetch_all(conn, "dashboard.open_requests"))
+        counts = queries.fetch_all(conn, "dashboard.status_counts")
+        overdue = queries.fetch_one(conn, "dashboard.overdue_count")
+        return {"requests": requests, **_summarize(counts, overdue)}
+    finally:
+        if conn:
+            conn.close()
+
+
+@router.get("/student", response_model=StudentDashboard)
+def student_dashboard(
+    current_user: dict = Depends(role_required(["Student", "Staff"])),
+    category_id: Optional[int] = Query(None, description="Filter equipment by category ID"),
+    search_term: Optional[str] = Query(None, description="Search equipment by name"),
+):
+    """Borrowable equipment (filterable) plus the caller's own requests and counts."""
+    conn = None
+    try:
+        conn = get_connection()
+        user_id = current_user["user_id"]
+
+        params = []
+        if category_id is not None:
+            params.append(category_id)
+        if search_term:
+            params.append(f"%{search_term}%")
+        name = BORROWABLE_QUERIES[(category_id is not None, bool(search_term))]
+        equipment = queries.fetch_all(conn, name, tuple(params))
+
+        requests = _requests(queries.fetch_all(conn, "dashboard.requests_by_requester", (user_id,)))
+        counts = queries.fetch_all(conn, "dashboard.status_counts_by_requester", (user_id,))
+        overdue = queries.fetch_one(conn, "dashboard.overdue_count_by_requester", (user_id,))
+        return {"equipment": equipment, "requests": requests, **_summarize(counts, overdue)}
+    finally:
+        if conn:
+            conn.close()
+
+
+@router.get("/admin", response_model=AdminDashboard)
+def admin_dashboard(current_user: dict = Depends(role_required(["Admin"]))):
+    """Full equipment inventory with category names, plus status counts."""
+    conn = None
+    try:
+        conn = get_connection()
+
+        equipment = queries.fetch_all(conn, "dashboard.all_equipment")
+        counts = queries.fetch_all(conn, "dashboard.status_counts")
+        overdue = queries.fetch_one(conn, "dashboard.overdue_count")
+        return {"equipment": equipment, **_summarize(counts, overdue)}
+    finally:
+        if conn:
+            conn.close()
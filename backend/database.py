@@ -1,16 +1,151 @@
-import mysql.connector
+from mysql.connector import pooling
+from mysql.connector.errors import PoolError
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
 import os
+import sys
+import threading
+import time
 from dotenv import load_dotenv
+from tenancy import current_school, shard_for, shard_config, shard_names, school_of_shard
 
 # Load environment variables
 load_dotenv()
 
-def get_connection():
-    conn = mysql.connector.connect(
-        host=os.getenv("DB_HOST"),
-        port=os.getenv("DB_PORT"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
-    )
+# --- Connection Pool Sizing ---
+# DB_MAX_CONNECTIONS is the budget for the whole deployment. Each worker process
+# (see worker_count()) gets an equal share of it,
+# split again across the tenant shards (see tenancy.py), so
+# workers * shards * pool size never exceeds the budget.
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "32"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+MAX_POOL_SIZE = 32  # hard limit of mysql.connector.pooling
+
+_pools: Dict[str, pooling.MySQLConnectionPool] = {}
+_pool_lock = threading.Lock()
+
+
+def _uvicorn_cli_workers() -> Optional[int]:
+    """`--workers` of a `uvicorn ...` command line, read with uvicorn's own option parser."""
+    argv0 = sys.argv[0] if sys.argv else ""
+    # `uvicorn ...` or `python -m uvicorn ...`; spawned workers inherit the parent's argv
+    if (os.path.splitext(os.path.basename(argv0))[0] != "uvicorn"
+            and os.path.basename(os.path.dirname(argv0)) != "uvicorn"):
+        return None
+    try:
+        from uvicorn.main import main as uvicorn_cli
+        context = uvicorn_cli.make_context("uvicorn", list(sys.argv[1:]), resilient_parsing=True)
+    except Exception:
+        return None
+    return context.params.get("workers")
+
+
+def worker_count() -> int:
+    """
+    Worker processes sharing DB_MAX_CONNECTIONS: uvicorn's `--workers` when started
+    by the uvicorn CLI, otherwise WEB_CONCURRENCY (which `python main.py --prod` sets,
+    and which uvicorn itself uses when --workers is not given).
+    """
+    workers = _uvicorn_cli_workers()
+    if workers is None:
+        workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    return max(1, workers)
+
+
+def pool_size_per_worker() -> int:
+    """
+    Connections per shard pool in this process. Raises when the budget cannot give
+    every pool at least one connection, rather than quietly going over it.
+    """
+    pools = worker_count() * len(shard_names())
+    share = DB_MAX_CONNECTIONS // pools
+    if share < 1:
+        raise RuntimeError(
+            f"DB_MAX_CONNECTIONS={DB_MAX_CONNECTIONS} is too small for {worker_count()} worker(s) x "
+            f"{len(shard_names())} shard(s): {pools} pools need at least one connection each. "
+            f"Raise DB_MAX_CONNECTIONS or run fewer workers."
+        )
+    return min(MAX_POOL_SIZE, share)
+
+
+class _SessionKeepingPool(pooling.MySQLConnectionPool):
+    """
+    Keeps sessions across borrows (no reset on return), since a reset would
+    deallocate the statements prepared on the connection (queries.py). What the
+    reset used to clean up is handled here instead: a connection handed back
+    mid-transaction, e.g. by a handler that raised, is rolled back on return so
+    its row locks are not held while it sits idle in the pool.
+    """
+
+    def add_connection(self, cnx=None):
+        if cnx is not None:
+            try:
+                if cnx.in_transaction:
+                    cnx.rollback()
+            except Exception:
+                # A broken connection is reconnected by the pool on its next borrow.
+                pass
+        super().add_connection(cnx)
+
+
+def _get_pool(shard: str):
+    pool = _pools.get(shard)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(shard)
+            if pool is None:
+                config = shard_config(shard)
+                pool = _SessionKeepingPool(
+                    pool_name=f"lending-{shard}-{os.getpid()}",
+                    pool_size=pool_size_per_worker(),
+                    pool_reset_session=False,
+                    host=config.get("host"),
+                    port=config.get("port"),
+                    user=config.get("user"),
+                    password=config.get("password"),
+                    database=config.get("database")
+                )
+                _pools[shard] = pool
+    return pool
+
+
+def get_connection(school_id: Optional[int] = None):
+    """
+    Borrow a connection to a school's shard from this process's pool; `conn.close()`
+    returns it. Defaults to the school of the request being served.
+    """
+    pool = _get_pool(shard_for(school_id if school_id is not None else current_school()))
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    while True:
+        try:
+            conn = pool.get_connection()
+            break
+        except PoolError:
+            # mysql.connector raises immediately when the pool is exhausted; wait for a free slot.
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.01)
+    # Safety net for a rollback on return that failed: never start inside another
+    # borrower's transaction (or read snapshot, autocommit is off).
+    if conn.in_transaction:
+        conn.rollback()
     return conn
+
+
+def fan_out(query_fn: Callable) -> Dict[str, object]:
+    """
+    Run `query_fn(conn)` once per shard, concurrently, and return {shard: result}.
+    `school_of_shard()` maps the keys back to schools.
+    """
+    shard_schools = school_of_shard()
+
+    def run(school_id: int):
+        conn = get_connection(school_id)
+        try:
+            return query_fn(conn)
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(max_workers=len(shard_schools)) as executor:
+        futures = {shard: executor.submit(run, school_id) for shard, school_id in shard_schools.items()}
+        return {shard: future.result() for shard, future in futures.items()}
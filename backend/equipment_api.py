@@ -2,12 +2,22 @@
 
 from fastapi import APIRouter, HTTPException, Depends, status, Query
 from typing import List, Optional
-from models import EquipmentDB
+from models import EquipmentDB, RestockItem
 from database import get_connection
-from auth_utils import get_current_user
+import queries
+from auth_utils import get_current_user, role_required
+from waitlist import allocate_quietly
 
 router = APIRouter(prefix="/equipment", tags=["2. Dashboard & Search"])
 
+# list_equipment statement for each (category filter?, name search?) combination
+LIST_AVAILABLE_QUERIES = {
+    (False, False): "equipment.list_available",
+    (True, False): "equipment.list_available_by_category",
+    (False, True): "equipment.list_available_by_name",
+    (True, True): "equipment.list_available_by_category_and_name",
+}
+
 @router.get("/", response_model=List[EquipmentDB])
 def list_equipment(
     current_user: dict = Depends(get_current_user), # Any authenticated user can view
@@ -21,95 +31,94 @@ def list_equipment(
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
-        
-        query = """
-        SELECT 
-            E.equipment_id, E.name, E.category_id, E.total_quantity, E.available_quantity
-        FROM 
-            equipment E
-        JOIN 
-            equipment_category C ON E.category_id = C.category_id
-        WHERE 
-            E.available_quantity > 0 
-        """
+
         params = []
-        
         if category_id is not None:
-            query += " AND E.category_id = %s"
             params.append(category_id)
-        
         if search_term:
-            query += " AND E.name LIKE %s"
-            search_like = f"%{search_term}%"
-            params.append(search_like)
-            
-        cur.execute(query, tuple(params))
-        results = cur.fetchall()
-        
-        return results
+            params.append(f"%{search_term}%")
+
+        name = LIST_AVAILABLE_QUERIES[(category_id is not None, bool(search_term))]
+        return queries.fetch_all(conn, name, tuple(params))
 
     except Exception as e:
         print(f"Error listing equipment: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Server error retrieving equipment list.")
     finally:
         if conn:
-            cur.close()
             conn.close()
 
 # Fetch all equipment
 @router.get("/", response_model=List[dict])
 def get_all_equipment():
-    conn = get_connection()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT * FROM equipment;")
-    data = cur.fetchall()
-    cur.close()
-    conn.close()
-    return data
+    conn = None
+    try:
+        conn = get_connection()
+        return queries.fetch_all(conn, "equipment.all")
+    finally:
+        if conn:
+            conn.close()
 
 # Insert new equipment
 @router.post("/", status_code=status.HTTP_201_CREATED)
 def add_equipment(equipment: dict):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO equipment (name, category_id, total_quantity, available_quantity)
-        VALUES (%s, %s, %s, %s)
-        """,
-        (equipment['name'], equipment['category_id'], equipment['total_quantity'], equipment['total_quantity'])
-    )
-    conn.commit()
-    equipment_id = cur.lastrowid
-    cur.close()
-    conn.close()
-    return {**equipment, "equipment_id": equipment_id, "available_quantity": equipment['total_quantity']}
+    conn = None
+    try:
+        conn = get_connection()
+        equipment_id = queries.insert(
+            conn, "equipment.insert",
+            (equipment['name'], equipment['category_id'], equipment['total_quantity'], equipment['total_quantity'])
+        )
+        conn.commit()
+        return {**equipment, "equipment_id": equipment_id, "available_quantity": equipment['total_quantity']}
+    finally:
+        if conn:
+            conn.close()
 
 # Update equipment
 @router.put("/{equipment_id}", status_code=status.HTTP_200_OK)
 def update_equipment(equipment_id: int, equipment: dict):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        UPDATE equipment SET name=%s, category_id=%s, total_quantity=%s, available_quantity=%s
-        WHERE equipment_id=%s
-        """,
-        (equipment['name'], equipment['category_id'], equipment['total_quantity'], equipment['available_quantity'], equipment_id)
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
+    conn = None
+    try:
+        conn = get_connection()
+        queries.execute(
+            conn, "equipment.update",
+            (equipment['name'], equipment['category_id'], equipment['total_quantity'], equipment['available_quantity'], equipment_id)
+        )
+        conn.commit()
+    finally:
+        if conn:
+            conn.close()
+    allocate_quietly([equipment_id])
     return {"message": f"Equipment with ID {equipment_id} updated successfully."}
 
+# Bulk restock: add units to several equipment items, then fill their waitlists
+@router.post("/restock", status_code=status.HTTP_200_OK)
+def restock_equipment(items: List[RestockItem], current_user: dict = Depends(role_required(["Admin", "Staff"]))):
+    if not items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No items to restock.")
+    conn = None
+    try:
+        conn = get_connection()
+        # One prepared statement executed per item, all in one transaction
+        for item in items:
+            queries.execute(conn, "equipment.restock", (item.quantity, item.quantity, item.equipment_id))
+        conn.commit()
+    finally:
+        if conn:
+            conn.close()
+    allocated = allocate_quietly([item.equipment_id for item in items], current_user['user_id'])
+    return {"message": f"Restocked {len(items)} equipment item(s).", "allocated_request_ids": allocated}
+
 # Delete equipment
 @router.delete("/{equipment_id}", status_code=status.HTTP_200_OK)
 def delete_equipment(equipment_id: int):
-    conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM equipment WHERE equipment_id=%s", (equipment_id,))
-    conn.commit()
-    cur.close()
-    conn.close()
-    return {"message": f"Equipment with ID {equipment_id} deleted successfully."}
\ No newline at end of file
+    conn = None
+    try:
+        conn = get_connection()
+        queries.execute(conn, "equipment.delete", (equipment_id,))
+        conn.commit()
+        return {"message": f"Equipment with ID {equipment_id} deleted successfully."}
+    finally:
+        if conn:
+            conn.close()
\ No newline at end of file
@@ -0,0 +1,45 @@
+# history_api.py
+
+from fastapi import APIRouter, Depends
+from typing import List
+from models import StatusHistoryEntry
+from database import get_connection
+import queries
+from auth_utils import role_required
+
+router = APIRouter(prefix="/history", tags=["History, Analytics & Maintenance"])
+
+HISTORY_SELECT = """
+    SELECT
+        H.history_id, H.request_id, H.equipment_id, H.from_status, H.to_status,
+        H.actor_id, U.full_name AS actor_name, H.changed_at, H.note
+    FROM lending_status_history H
+    LEFT JOIN users U ON H.actor_id = U.user_id
+"""
+
+queries.register("history.by_request", HISTORY_SELECT + " WHERE H.request_id = %s ORDER BY H.changed_at, H.history_id")
+queries.register("history.by_equipment", HISTORY_SELECT + " WHERE H.equipment_id = %s ORDER BY H.changed_at, H.history_id")
+
+
+@router.get("/request/{request_id}", response_model=List[StatusHistoryEntry])
+def get_request_history(request_id: int, current_user: dict = Depends(role_required(["Admin", "Staff"]))):
+    """Every status transition of one lending request, oldest first."""
+    conn = None
+    try:
+        conn = get_connection()
+        return queries.fetch_all(conn, "history.by_request", (request_id,))
+    finally:
+        if conn:
+            conn.close()
+
+
+@router.get("/equipment/{equipment_id}", response_model=List[StatusHistoryEntry])
+def get_equipment_history(equipment_id: int, current_user: dict = Depends(role_required(["Admin", "Staff"]))):
+    """Every status transition of requests for one equipment item, oldest first."""
+    conn = None
+    try:
+        conn = get_connection()
+        return queries.fetch_all(conn, "history.by_equipment", (equipment_id,))
+    finally:
+        if conn:
+            conn.close()
@@ -0,0 +1,21 @@
+# inventory_api.py
+
+from fastapi import APIRouter, HTTPException, Depends, status, Query
+from models import ReconciliationReport
+from auth_utils import role_required
+from inventory_reconciliation import reconcile, ReconciliationInProgress
+
+router = APIRouter(prefix="/inventory", tags=["History, Analytics & Maintenance"])
+
+
+@router.post("/reconcile", response_model=ReconciliationReport)
+def reconcile_inventory(
+    repair: bool = Query(False, description="Fix drifted available_quantity values"),
+    full: bool = Query(False, description="Check all equipment instead of only rows touched since the last run"),
+    current_user: dict = Depends(role_required(["Admin"])),
+):
+    """Admin: report (and optionally repair) drift between available_quantity and issued loans."""
+    try:
+        return reconcile(repair=repair, full=full)
+    except ReconciliationInProgress as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
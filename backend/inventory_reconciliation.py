@@ -0,0 +1,190 @@
+# inventory_reconciliation.py
+
+"""
+Reconciles the denormalized `equipment.available_quantity` counter with
+`lending_requests`: expected availability is `total_quantity` minus the units
+of all 'Issued' requests for that equipment.
+
+Equipment is scanned in keyset-paginated chunks, one set-based query per
+chunk. Incremental runs only re-check equipment whose row, or one of whose
+lending requests, changed since the stored watermark. Repairs are one
+set-based UPDATE per chunk that recomputes the value at write time, so a
+loan issued between the check and the repair is not overwritten.
+
+Runs against the current school's shard. From the admin endpoint
+(POST /inventory/reconcile) or as a job:
+    python inventory_reconciliation.py [--repair] [--full] [--school ID]
+"""
+
+import argparse
+import os
+from datetime import timedelta
+from typing import Optional
+
+from database import get_connection
+from tenancy import DEFAULT_SCHOOL_ID, set_current_school
+
+JOB_NAME = "inventory_reconciliation"
+RECONCILE_CHUNK_SIZE = int(os.getenv("RECONCILE_CHUNK_SIZE", "500"))
+# Rows written by a transaction that started before the watermark but committed
+# after it carry an older updated_at; re-checking a short overlap catches them.
+WATERMARK_OVERLAP = timedelta(seconds=int(os.getenv("RECONCILE_WATERMARK_OVERLAP", "300")))
+
+CHECK_QUERY = """
+    SELECT
+        E.equipment_id, E.name, E.total_quantity, E.available_quantity,
+        GREATEST(E.total_quantity - COALESCE(SUM(R.quantity), 0), 0) AS expected_available
+    FROM equipment E
+    LEFT JOIN lending_requests R
+        ON R.equipment_id = E.equipment_id AND R.status = 'Issued'
+    WHERE E.equipment_id > %s {touched_filter}
+    GROUP BY E.equipment_id, E.name, E.total_quantity, E.available_quantity
+    ORDER BY E.equipment_id
+    LIMIT %s
+"""
+
+TOUCHED_FILTER = """
+    AND E.equipment_id IN (
+        SELECT equipment_id FROM equipment WHERE updated_at >= %s
+        UNION
+        SELECT equipment_id FROM lending_requests WHERE updated_at >= %s
+    )
+"""
+
+REPAIR_QUERY = """
+    UPDATE equipment E
+    LEFT JOIN (
+        SELECT equipment_id, SUM(quantity) AS issued
+        FROM lending_requests
+        WHERE status = 'Issued' AND equipment_id IN ({ids})
+        GROUP BY equipment_id
+    ) I ON I.equipment_id = E.equipment_id
+    SET E.available_quantity = GREATEST(E.total_quantity - COALESCE(I.issued, 0), 0)
+    WHERE E.equipment_id IN ({ids})
+"""
+
+
+class ReconciliationInProgress(Exception):
+    pass
+
+
+def _get_watermark(cur):
+    cur.execute("SELECT watermark FROM job_watermarks WHERE job_name = %s", (JOB_NAME,))
+    row = cur.fetchone()
+    return row["watermark"] if row else None
+
+
+def _set_watermark(cur, watermark):
+    cur.execute(
+        "INSERT INTO job_watermarks (job_name, watermark) VALUES (%s, %s) "
+        "ON DUPLICATE KEY UPDATE watermark = VALUES(watermark)",
+        (JOB_NAME, watermark),
+    )
+
+
+def reconcile(repair: bool = False, full: bool = False, chunk_size: Optional[int] = None) -> dict:
+    """
+    Check (and optionally repair) available_quantity drift.
+
+    `full=True` ignores the watermark and checks every equipment row. The
+    watermark only advances when the run repaired drift or found none, so a
+    report-only run never hides drift from the next run.
+    """
+    chunk_size = chunk_size or RECONCILE_CHUNK_SIZE
+    conn = None
+    try:
+        conn = get_connection()
+        cur = conn.cursor(dictionary=True)
+
+        # One run per database at a time across all workers and job processes.
+        # Named locks are server-wide and several shard databases may share a server,
+        # so the lock is keyed by the database whose tables this run reconciles.
+        cur.execute("SELECT CONCAT(%s, ':', DATABASE()) AS lock_name", (JOB_NAME,))
+        lock_name = cur.fetchone()["lock_name"]
+        cur.execute("SELECT GET_LOCK(%s, 0) AS acquired", (lock_name,))
+        if not cur.fetchone()["acquired"]:
+            raise ReconciliationInProgress("Inventory reconciliation is already running.")
+
+        try:
+            cur.execute("SELECT NOW(6) AS started_at")
+            started_at = cur.fetchone()["started_at"]
+            watermark = None if full else _get_watermark(cur)
+            since = watermark - WATERMARK_OVERLAP if watermark else None
+
+            if since is None:
+                query = CHECK_QUERY.format(touched_filter="")
+            else:
+                query = CHECK_QUERY.format(touched_filter=TOUCHED_FILTER)
+
+            checked = repaired = 0
+            drift = []
+            last_id = 0
+            while True:
+                params = (last_id, since, since, chunk_size) if since else (last_id, chunk_size)
+                cur.execute(query, params)
+                rows = cur.fetchall()
+                if not rows:
+                    break
+                checked += len(rows)
+                last_id = rows[-1]["equipment_id"]
+
+                drifted = [r for r in rows if r["available_quantity"] != r["expected_available"]]
+                for r in drifted:
+                    drift.append({
+                        "equipment_id": r["equipment_id"],
+                        "name": r["name"],
+                        "total_quantity": r["total_quantity"],
+                        "available_quantity": r["available_quantity"],
+                        "expected_available": int(r["expected_available"]),
+                        "difference": r["available_quantity"] - int(r["expected_available"]),
+                    })
+
+                if repair and drifted:
+                    ids = [r["equipment_id"] for r in drifted]
+                    placeholders = ", ".join(["%s"] * len(ids))
+                    cur.execute(REPAIR_QUERY.format(ids=placeholders), tuple(ids) + tuple(ids))
+                    repaired += cur.rowcount
+                    conn.commit()
+
+                if len(rows) < chunk_size:
+                    break
+
+            advanced = repair or not drift
+            if advanced:
+                _set_watermark(cur, started_at)
+            conn.commit()
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s) AS released", (lock_name,))
+            cur.fetchone()
+
+        return {
+            "mode": "full" if since is None else "incremental",
+            "checked_since": since,
+            "checked": checked,
+            "drifted": len(drift),
+            "repaired": repaired,
+            "watermark": started_at if advanced else watermark,
+            "drift": drift,
+        }
+    finally:
+        if conn:
+            cur.close()
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile equipment.available_quantity with lending requests")
+    parser.add_argument("--repair", action="store_true", help="Fix drifted rows (default: report only)")
+    parser.add_argument("--full", action="store_true", help="Ignore the watermark and check all equipment")
+    parser.add_argument("--chunk-size", type=int, default=RECONCILE_CHUNK_SIZE)
+    parser.add_argument("--school", type=int, default=DEFAULT_SCHOOL_ID, help="School whose shard to reconcile")
+    args = parser.parse_args()
+
+    set_current_school(args.school)
+
+    report = reconcile(repair=args.repair, full=args.full, chunk_size=args.chunk_size)
+    for item in report["drift"]:
+        print(f"#{item['equipment_id']} {item['name']}: available {item['available_quantity']}, "
+              f"expected {item['expected_available']} ({item['difference']:+d})")
+    print(f"{report['mode']} run: checked {report['checked']}, drifted {report['drifted']}, "
+          f"repaired {report['repaired']}")
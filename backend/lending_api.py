@@ -2,9 +2,11 @@ from fastapi import APIRouter, HTTPException, Depends, status, Query, Body
 from typing import List, Optional
 from models import LendingRequestCreate, LendingRequestDB, OverdueNotification
 from database import get_connection
+import queries
 from auth_utils import role_required
-import mysql.connector
-from datetime import date
+from status_history import record_transition
+from waitlist import locked_stock, has_waiting, allocate_quietly, priority_for
+from datetime import date, datetime
 
 router = APIRouter(prefix="/lending", tags=["Due Date Tracking & Requests"])
 
@@ -22,85 +24,101 @@ def _row_to_request(row: dict) -> LendingRequestDB:
 
 @router.post("/request", response_model=LendingRequestDB, status_code=status.HTTP_201_CREATED)
 def create_lending_request(request_data: LendingRequestCreate, current_user: dict = Depends(role_required(["Student", "Staff"]))):
+    """
+    Creates a Pending request, or a Waitlisted one when not enough units are free
+    (or others are already waiting for this equipment, to keep the queue fair).
+    Joining a non-empty line while units are free runs an allocation, so the
+    line (including this request, in its turn) gets those units.
+    """
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
         requester_id = current_user['user_id']
+        conn.start_transaction()
 
-        cur.execute("SELECT available_quantity FROM equipment WHERE equipment_id = %s",
-                    (request_data.equipment_id,))
-        available_data = cur.fetchone()
+        # Locks the equipment row: free units cannot change until this request is stored
+        stock = locked_stock(conn, request_data.equipment_id)
 
-        if not available_data or available_data['available_quantity'] < request_data.quantity:
+        if not stock or stock['total_quantity'] < request_data.quantity:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                                 detail="Insufficient quantity available.")
 
-        insert_query = """
-            INSERT INTO lending_requests 
-              (equipment_id, requester_id, request_date, expected_return_date, quantity, status)
-            VALUES (%s, %s, NOW(), %s, %s, 'Pending')
-        """
-        params = (request_data.equipment_id, requester_id,
-                  request_data.expected_return_date, request_data.quantity)
-        cur.execute(insert_query, params)
-        request_id = cur.lastrowid
+        line_waiting = has_waiting(conn, request_data.equipment_id)
+        waitlisted = stock['free_units'] < request_data.quantity or line_waiting
+        request_status = "Waitlisted" if waitlisted else "Pending"
+        priority = priority_for(current_user['role'])
+        request_date = datetime.now().replace(microsecond=0)
+
+        params = (request_data.equipment_id, requester_id, request_date,
+                  request_data.expected_return_date, request_data.quantity, request_status, priority)
+        request_id = queries.insert(conn, "lending.insert", params)
         conn.commit()
+        # Allocation borrows its own connection: hand this one back first so the two
+        # never hold two slots of the (small) per-worker pool at once.
+        conn.close()
+        conn = None
+        record_transition(request_id, request_data.equipment_id, None, request_status, requester_id)
+
+        if line_waiting and stock['free_units'] > 0:
+            if request_id in allocate_quietly([request_data.equipment_id], requester_id):
+                request_status = "Pending"
 
         return {
             "request_id": request_id,
             "equipment_id": request_data.equipment_id,
             "requester_id": requester_id,
-            "request_date": date.today().isoformat(),
+            "request_date": request_date,
             "expected_return_date": request_data.expected_return_date,
             "quantity": request_data.quantity,
-            "status": "Pending"
+            "status": request_status
         }
     finally:
         if conn:
-            cur.close()
             conn.close()
 
 
 @router.post("/approve/{request_id}", status_code=status.HTTP_200_OK)
 def approve_request(request_id: int, current_user: dict = Depends(role_required(["Admin", "Staff"]))):
+    """
+    Issue a Pending request. The equipment row stays locked from the stock check to
+    the update, and the UPDATE only matches a request still Pending, so neither two
+    approvals nor a double approve can take more units than are available.
+    """
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
         approver_id = current_user['user_id']
         borrow_date = date.today()
 
-        cur.execute(
-            "SELECT equipment_id, quantity FROM lending_requests WHERE request_id = %s AND status = 'Pending'", (request_id,))
-        data = cur.fetchone()
+        data = queries.fetch_one(conn, "lending.pending_by_id", (request_id,))
         if not data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail="Request not found or not in 'Pending' status.")
 
-        cur.execute(
-            "SELECT available_quantity FROM equipment WHERE equipment_id = %s", (data['equipment_id'],))
-        equip = cur.fetchone()
-        if not equip or equip['available_quantity'] < data['quantity']:
+        conn.start_transaction()
+        stock = locked_stock(conn, data['equipment_id'])
+        if not stock or stock['available_quantity'] < data['quantity']:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                                 detail="Insufficient quantity available to approve this request.")
 
-        cur.execute("UPDATE lending_requests SET status = 'Issued', approver_id = %s, borrow_date = %s WHERE request_id = %s",
-                    (approver_id, borrow_date, request_id))
-        cur.execute("UPDATE equipment SET available_quantity = available_quantity - %s WHERE equipment_id = %s",
-                    (data['quantity'], data['equipment_id']))
+        if queries.execute(conn, "lending.issue", (approver_id, borrow_date, request_id)) != 1:
+            # Approved or rejected by someone else since it was read
+            conn.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail="Request is no longer in 'Pending' status.")
+        queries.execute(conn, "equipment.take_units", (data['quantity'], data['equipment_id']))
         conn.commit()
+        record_transition(request_id, data['equipment_id'], "Pending", "Issued", approver_id)
         return {"message": f"Request {request_id} approved and item issued."}
     finally:
         if conn:
-            cur.close()
             conn.close()
 
 
 @router.post("/reject/{request_id}", status_code=status.HTTP_200_OK)
 def reject_request(request_id: int, payload: dict = Body(...), current_user: dict = Depends(role_required(["Admin", "Staff"]))):
     """
-    Mark a Pending request as Rejected and store a rejection reason.
+    Mark a Pending or Waitlisted request as Rejected and store a rejection reason.
     Expects JSON body: { "reason": "Insufficient stock", ... }
     """
     reason = None
@@ -112,34 +130,26 @@ def reject_request(request_id: int, payload: dict = Body(...), current_user: dic
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
 
-        cur.execute(
-            "SELECT status FROM lending_requests WHERE request_id = %s", (request_id,))
-        row = cur.fetchone()
+        row = queries.fetch_one(conn, "lending.status_by_id", (request_id,))
         if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Request not found.")
-        if row['status'] != 'Pending':
+        if row['status'] not in ('Pending', 'Waitlisted'):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                detail="Only requests in 'Pending' status can be rejected.")
-
-        try:
-            cur.execute(
-                "UPDATE lending_requests SET status = 'Rejected', approver_id = %s, rejection_reason = %s WHERE request_id = %s",
-                (current_user['user_id'], reason, request_id)
-            )
-        except mysql.connector.errors.ProgrammingError:
-            cur.execute(
-                "UPDATE lending_requests SET status = 'Rejected', approver_id = %s WHERE request_id = %s",
-                (current_user['user_id'], request_id)
-            )
+                                detail="Only requests in 'Pending' or 'Waitlisted' status can be rejected.")
 
+        queries.execute(conn, "lending.reject", (current_user['user_id'], reason, request_id))
         conn.commit()
+        conn.close()
+        conn = None
+        record_transition(request_id, row['equipment_id'], row['status'], "Rejected", current_user['user_id'], reason)
+        if row['status'] == 'Pending':
+            # Units the rejected request was holding can go to the waitlist
+            allocate_quietly([row['equipment_id']], current_user['user_id'])
         return {"message": f"Request {request_id} rejected.", "rejection_reason": reason}
     finally:
         if conn:
-            cur.close()
             conn.close()
 
 
@@ -148,25 +158,23 @@ def return_request(request_id: int, current_user: dict = Depends(role_required([
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
         return_date = date.today()
 
-        cur.execute(
-            "SELECT equipment_id, quantity FROM lending_requests WHERE request_id = %s AND status = 'Issued'", (request_id,))
-        data = cur.fetchone()
+        data = queries.fetch_one(conn, "lending.issued_by_id", (request_id,))
         if not data:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail="Request not found or not in 'Issued' status.")
 
-        cur.execute("UPDATE lending_requests SET status = 'Returned', return_date = %s WHERE request_id = %s",
-                    (return_date, request_id))
-        cur.execute("UPDATE equipment SET available_quantity = available_quantity + %s WHERE equipment_id = %s",
-                    (data['quantity'], data['equipment_id']))
+        queries.execute(conn, "lending.return", (return_date, request_id))
+        queries.execute(conn, "equipment.return_units", (data['quantity'], data['equipment_id']))
         conn.commit()
+        conn.close()
+        conn = None
+        record_transition(request_id, data['equipment_id'], "Issued", "Returned", current_user['user_id'])
+        allocate_quietly([data['equipment_id']], current_user['user_id'])
         return {"message": f"Item from request {request_id} returned successfully."}
     finally:
         if conn:
-            cur.close()
             conn.close()
 
 
@@ -177,27 +185,10 @@ def get_overdue_loans(
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
-
-        query = """
-        SELECT
-            R.request_id, U.full_name AS borrower_name, U.email AS requester_email, 
-            E.name AS equipment_name, R.expected_return_date
-        FROM lending_requests R
-        JOIN users U ON R.requester_id = U.user_id
-        JOIN equipment E ON R.equipment_id = E.equipment_id
-        WHERE
-            R.status = 'Issued' 
-            AND R.expected_return_date < CURDATE()
-        """
-        cur.execute(query)
-        results = cur.fetchall()
-
-        return results
+        return queries.fetch_all(conn, "lending.overdue")
 
     finally:
         if conn:
-            cur.close()
             conn.close()
 
 
@@ -209,13 +200,10 @@ def list_all_requests(current_user: dict = Depends(role_required(["Admin", "Staf
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
-        cur.execute("SELECT * FROM lending_requests ORDER BY request_date DESC")
-        rows = cur.fetchall()
+        rows = queries.fetch_all(conn, "lending.all")
         return [_row_to_request(r) for r in rows]
     finally:
         if conn:
-            cur.close()
             conn.close()
 
 
@@ -228,19 +216,14 @@ def list_requests_by_status(status: Optional[str] = Query(None, title="status",
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
 
         if status:
-            cur.execute(
-                "SELECT * FROM lending_requests WHERE status = %s ORDER BY request_date DESC", (status,))
+            rows = queries.fetch_all(conn, "lending.by_status", (status,))
         else:
-            cur.execute(
-                "SELECT * FROM lending_requests ORDER BY request_date DESC")
-        rows = cur.fetchall()
+            rows = queries.fetch_all(conn, "lending.all")
         return [_row_to_request(r) for r in rows]
     finally:
         if conn:
-            cur.close()
             conn.close()
 
 
@@ -249,15 +232,11 @@ def get_request(request_id: int, current_user: dict = Depends(role_required(["Ad
     conn = None
     try:
         conn = get_connection()
-        cur = conn.cursor(dictionary=True)
-        cur.execute(
-            "SELECT * FROM lending_requests WHERE request_id = %s", (request_id,))
-        row = cur.fetchone()
+        row = queries.fetch_one(conn, "lending.by_id", (request_id,))
         if not row:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Request not found.")
         return _row_to_request(row)
     finally:
         if conn:
-            cur.close()
             conn.close()
@@ -1,7 +1,10 @@
 # main.py - UPDATED WITH CORS SUPPORT
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import argparse
+import os
 import uvicorn
 from dotenv import load_dotenv
 
@@ -14,9 +17,35 @@ from equipment_api import router as equipment_router
 from equipment_category_api import router as equipment_category_router
 from lending_api import router as lending_router
 from analytics_api import router as analytics_router
+from history_api import router as history_router
+from inventory_api import router as inventory_router
+from dashboard_api import router as dashboard_router
+from metrics_api import router as metrics_router
+from status_history import history_writer
+from tenancy import TenantMiddleware
+from database import pool_size_per_worker
+
+# --- Startup / Shutdown ---
+# Runs once per worker process. State created here (DB pool, history queue and
+# its spill file) is deliberately per-process: nothing is shared between workers.
+# The waitlist has no in-process state; it is read from the DB on every allocation.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fails the worker's startup if the DB connection budget is too small for it
+    pool_size_per_worker()
+    # Replays any spilled history events, then starts the background writer
+    history_writer.start()
+    yield
+    # Flushes queued history events before the process exits
+    history_writer.stop()
 
 # --- Initialize FastAPI App ---
-app = FastAPI(title="School Equipment Lending Portal")
+app = FastAPI(title="School Equipment Lending Portal", lifespan=lifespan)
+
+# --- Tenant Routing ---
+# Routes each request's DB connections to the shard of the token's school.
+# Added before CORS so CORS stays outermost and also covers tenant errors.
+app.add_middleware(TenantMiddleware)
 
 # ✅ --- Enable CORS Middleware ---
 # Allow your frontend (React) to access the API
@@ -38,6 +67,10 @@ app.include_router(equipment_router)
 app.include_router(equipment_category_router)
 app.include_router(lending_router)
 app.include_router(analytics_router)
+app.include_router(history_router)
+app.include_router(inventory_router)
+app.include_router(dashboard_router)
+app.include_router(metrics_router)
 
 # --- Base route for status check ---
 @app.get("/")
@@ -45,5 +78,32 @@ def read_root():
     return {"message": "Welcome to the School Equipment Lending Portal API. Check /docs for endpoints."}
 
 # --- Run app directly ---
+# Development:  python main.py                 (single process, auto-reload)
+# Production:   python main.py --prod [--workers N]
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
+    parser = argparse.ArgumentParser(description="School Equipment Lending Portal API")
+    parser.add_argument("--prod", action="store_true", help="Run multiple worker processes without auto-reload")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+                        help="Worker processes in --prod mode (default: CPU count)")
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args()
+
+    if args.prod:
+        # Workers read this to size their share of the DB connection budget (see database.py)
+        os.environ["WEB_CONCURRENCY"] = str(args.workers)
+        try:
+            pool_size_per_worker()
+        except RuntimeError as e:
+            parser.error(str(e))
+        uvicorn.run(
+            "main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            # On SIGTERM/SIGINT: stop accepting, let in-flight requests finish, then run lifespan shutdown
+            timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", "30")),
+            access_log=False,
+        )
+    else:
+        uvicorn.run("main:app", host=args.host, port=args.port, reload=True)
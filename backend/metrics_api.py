@@ -0,0 +1,23 @@
+# metrics_api.py
+
+from fastapi import APIRouter, Depends, Query
+from models import QueryMetrics
+from auth_utils import role_required
+import queries
+
+router = APIRouter(prefix="/metrics", tags=["History, Analytics & Maintenance"])
+
+
+@router.get("/queries", response_model=QueryMetrics)
+def get_query_metrics(
+    reset: bool = Query(False, description="Clear the counters after reading them"),
+    current_user: dict = Depends(role_required(["Admin"])),
+):
+    """
+    Admin: per-statement calls, prepares and timings of the registered queries.
+    Counters are per worker process; with several workers each call sees one of them (`pid`).
+    """
+    stats = queries.query_stats()
+    if reset:
+        queries.reset_stats()
+    return stats
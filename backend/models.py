@@ -1,7 +1,7 @@
 # models.py
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import date, datetime
 
 # --- User Authentication & Roles ---
@@ -20,10 +20,12 @@ class UserCreate(BaseModel):
     email: str
     phone: Optional[str] = None
     role: str
+    school_id: Optional[int] = None  # defaults to DEFAULT_SCHOOL_ID
 
 class LoginRequest(BaseModel):
     username: str
     password: str
+    school_id: Optional[int] = None  # defaults to DEFAULT_SCHOOL_ID
 
 class Token(BaseModel):
     access_token: str
@@ -31,6 +33,7 @@ class Token(BaseModel):
     user_id: int
     role: str
     full_name: str
+    school_id: int
 
 # --- Equipment Listing & Search ---
 
@@ -49,6 +52,13 @@ class EquipmentDB(EquipmentBase):
     class Config:
         from_attributes = True
 
+class RestockItem(BaseModel):
+    equipment_id: int
+    quantity: int = Field(..., ge=1)
+
+class EquipmentWithCategory(EquipmentDB):
+    category_name: str
+
 # --- Lending Requests & Due Date Tracking ---
 
 class LendingRequestCreate(BaseModel):
@@ -60,9 +70,20 @@ class LendingRequestDB(LendingRequestCreate):
     request_id: int
     requester_id: int
     request_date: datetime
-    status: str = Field(..., pattern="^(Pending|Approved|Issued|Rejected|Returned)$")
+    status: str = Field(..., pattern="^(Waitlisted|Pending|Approved|Issued|Rejected|Returned)$")
     borrow_date: Optional[date] = None
 
+class StatusHistoryEntry(BaseModel):
+    history_id: int
+    request_id: int
+    equipment_id: Optional[int] = None
+    from_status: Optional[str] = None
+    to_status: str
+    actor_id: Optional[int] = None
+    actor_name: Optional[str] = None
+    changed_at: datetime
+    note: Optional[str] = None
+
 class OverdueNotification(BaseModel):
     request_id: int
     borrower_name: str
@@ -70,6 +91,80 @@ class OverdueNotification(BaseModel):
     equipment_name: str
     expected_return_date: date
 
+# --- Dashboards ---
+
+class DashboardRequest(BaseModel):
+    request_id: int
+    equipment_id: int
+    equipment_name: str
+    requester_id: int
+    requester_name: str
+    request_date: datetime
+    borrow_date: Optional[date] = None
+    expected_return_date: date
+    quantity: int
+    status: str
+    rejection_reason: Optional[str] = None
+    is_overdue: bool
+
+class StatusCounts(BaseModel):
+    Waitlisted: int = 0
+    Pending: int = 0
+    Approved: int = 0
+    Issued: int = 0
+    Rejected: int = 0
+    Returned: int = 0
+
+class StaffDashboard(BaseModel):
+    requests: List[DashboardRequest]
+    counts: StatusCounts
+    overdue_count: int
+
+class StudentDashboard(BaseModel):
+    equipment: List[EquipmentWithCategory]
+    requests: List[DashboardRequest]
+    counts: StatusCounts
+    overdue_count: int
+
+class AdminDashboard(BaseModel):
+    equipment: List[EquipmentWithCategory]
+    counts: StatusCounts
+    overdue_count: int
+
+# --- Inventory Reconciliation ---
+
+class InventoryDrift(BaseModel):
+    equipment_id: int
+    name: str
+    total_quantity: int
+    available_quantity: int
+    expected_available: int
+    difference: int
+
+class ReconciliationReport(BaseModel):
+    mode: str
+    checked_since: Optional[datetime] = None
+    checked: int
+    drifted: int
+    repaired: int
+    watermark: Optional[datetime] = None
+    drift: List[InventoryDrift]
+
+# --- Query Metrics (per worker process) ---
+
+class QueryStat(BaseModel):
+    name: str
+    calls: int
+    prepares: int
+    errors: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+
+class QueryMetrics(BaseModel):
+    pid: int
+    statements: List[QueryStat]
+
 # --- Damage/Repair Log ---
 
 class RepairLogCreate(BaseModel):
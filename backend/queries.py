@@ -0,0 +1,238 @@
+# queries.py
+
+"""
+Registry of the SQL statements the routers run, executed as server-side
+prepared statements.
+
+Each statement is registered once under a name in QUERIES. The first time a
+pooled connection runs it, the statement is prepared with the binary protocol
+and its cursor is kept for as long as that connection lives; later executions
+send only the statement id and the parameters, so MySQL does not re-parse the
+text. This relies on the pools not resetting sessions on return (see
+database.py), which would deallocate the statements.
+
+Per-statement call counts and timings (execute + fetch) are kept per worker
+process and served by GET /metrics/queries.
+
+Statements whose text depends on the input (the reconciliation job's IN lists
+of varying length) and the history writer's batch inserts stay as text
+queries in their own modules.
+"""
+
+import os
+import threading
+import time
+import weakref
+from typing import Dict, List, Optional
+
+from mysql.connector import errors
+
+ER_UNKNOWN_STMT_HANDLER = 1243
+
+QUERIES: Dict[str, str] = {
+    # --- users_api ---
+    "user.id_by_username": "SELECT user_id FROM users WHERE username = %s",
+    "user.login_by_username":
+        "SELECT user_id, username, password_hash, role, full_name FROM users WHERE username = %s",
+    "user.insert": """
+        INSERT INTO users (username, password_hash, full_name, email, phone_number, role)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """,
+
+    # --- equipment_api ---
+    # list_equipment: one fixed statement per filter combination
+    "equipment.list_available": """
+        SELECT E.equipment_id, E.name, E.category_id, E.total_quantity, E.available_quantity
+        FROM equipment E JOIN equipment_category C ON E.category_id = C.category_id
+        WHERE E.available_quantity > 0
+    """,
+    "equipment.list_available_by_category": """
+        SELECT E.equipment_id, E.name, E.category_id, E.total_quantity, E.available_quantity
+        FROM equipment E JOIN equipment_category C ON E.category_id = C.category_id
+        WHERE E.available_quantity > 0 AND E.category_id = %s
+    """,
+    "equipment.list_available_by_name": """
+        SELECT E.equipment_id, E.name, E.category_id, E.total_quantity, E.available_quantity
+        FROM equipment E JOIN equipment_category C ON E.category_id = C.category_id
+        WHERE E.available_quantity > 0 AND E.name LIKE %s
+    """,
+    "equipment.list_available_by_category_and_name": """
+        SELECT E.equipment_id, E.name, E.category_id, E.total_quantity, E.available_quantity
+        FROM equipment E JOIN equipment_category C ON E.category_id = C.category_id
+        WHERE E.available_quantity > 0 AND E.category_id = %s AND E.name LIKE %s
+    """,
+    "equipment.all": "SELECT * FROM equipment",
+    "equipment.insert": """
+        INSERT INTO equipment (name, category_id, total_quantity, available_quantity)
+        VALUES (%s, %s, %s, %s)
+    """,
+    "equipment.update": """
+        UPDATE equipment SET name=%s, category_id=%s, total_quantity=%s, available_quantity=%s
+        WHERE equipment_id=%s
+    """,
+    "equipment.restock": """
+        UPDATE equipment SET total_quantity = total_quantity + %s, available_quantity = available_quantity + %s
+        WHERE equipment_id = %s
+    """,
+    "equipment.delete": "DELETE FROM equipment WHERE equipment_id=%s",
+    "equipment.take_units": "UPDATE equipment SET available_quantity = available_quantity - %s WHERE equipment_id = %s",
+    "equipment.return_units": "UPDATE equipment SET available_quantity = available_quantity + %s WHERE equipment_id = %s",
+
+    # --- equipment_category_api ---
+    "category.all": "SELECT * FROM equipment_category",
+    "category.insert": "INSERT INTO equipment_category (category_name, description) VALUES (%s, %s)",
+    "category.update": "UPDATE equipment_category SET category_name=%s, description=%s WHERE category_id=%s",
+    "category.delete": "DELETE FROM equipment_category WHERE category_id=%s",
+
+    # --- lending_api ---
+    "lending.insert": """
+        INSERT INTO lending_requests
+          (equipment_id, requester_id, request_date, expected_return_date, quantity, status, priority)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+    """,
+    "lending.pending_by_id":
+        "SELECT equipment_id, quantity FROM lending_requests WHERE request_id = %s AND status = 'Pending'",
+    "lending.issued_by_id":
+        "SELECT equipment_id, quantity FROM lending_requests WHERE request_id = %s AND status = 'Issued'",
+    "lending.status_by_id": "SELECT status, equipment_id FROM lending_requests WHERE request_id = %s",
+    "lending.issue": """
+        UPDATE lending_requests SET status = 'Issued', approver_id = %s, borrow_date = %s
+        WHERE request_id = %s AND status = 'Pending'
+    """,
+    "lending.reject":
+        "UPDATE lending_requests SET status = 'Rejected', approver_id = %s, rejection_reason = %s WHERE request_id = %s",
+    "lending.return": "UPDATE lending_requests SET status = 'Returned', return_date = %s WHERE request_id = %s",
+    "lending.overdue": """
+        SELECT
+            R.request_id, U.full_name AS borrower_name, U.email AS requester_email,
+            E.name AS equipment_name, R.expected_return_date
+        FROM lending_requests R
+        JOIN users U ON R.requester_id = U.user_id
+        JOIN equipment E ON R.equipment_id = E.equipment_id
+        WHERE R.status = 'Issued' AND R.expected_return_date < CURDATE()
+    """,
+    "lending.all": "SELECT * FROM lending_requests ORDER BY request_date DESC",
+    "lending.by_status": "SELECT * FROM lending_requests WHERE status = %s ORDER BY request_date DESC",
+    "lending.by_id": "SELECT * FROM lending_requests WHERE request_id = %s",
+}
+
+_prepared = weakref.WeakKeyDictionary()  # raw connection -> (connection id, {name: prepared cursor})
+_prepared_lock = threading.Lock()
+_stats: Dict[str, dict] = {}
+_stats_lock = threading.Lock()
+
+
+def register(name: str, sql: str) -> str:
+    """Add a statement to the registry (for modules that keep their SQL next to the code)."""
+    if QUERIES.get(name, sql) != sql:
+        raise ValueError(f"Query '{name}' is already registered with different SQL")
+    QUERIES[name] = sql
+    return name
+
+
+def _cursor(conn, name: str):
+    """The prepared cursor for `name` on this connection, created on first use."""
+    # Pooled connections are wrappers handed out per borrow; statements belong to the raw connection.
+    raw = getattr(conn, "_cnx", conn)
+    connection_id = raw.connection_id
+    with _prepared_lock:
+        cached = _prepared.get(raw)
+        if cached is None or cached[0] != connection_id:
+            # First use, or the pool reconnected it: statements of the old session are gone.
+            cached = (connection_id, {})
+            _prepared[raw] = cached
+        cursors = cached[1]
+    cur = cursors.get(name)
+    if cur is None:
+        cur = cursors[name] = raw.cursor(prepared=True, dictionary=True)
+        _record(name, prepared=True)
+    return cur
+
+
+def _forget(conn, name: str):
+    raw = getattr(conn, "_cnx", conn)
+    with _prepared_lock:
+        cached = _prepared.get(raw)
+        cur = cached[1].pop(name, None) if cached else None
+    if cur is not None:
+        try:
+            cur.close()
+        except Exception:
+            pass
+
+
+def _record(name: str, seconds: float = 0.0, prepared: bool = False, failed: bool = False):
+    with _stats_lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = {"calls": 0, "prepares": 0, "errors": 0, "total": 0.0, "max": 0.0}
+        if prepared:
+            stat["prepares"] += 1
+            return
+        stat["calls"] += 1
+        stat["total"] += seconds
+        stat["max"] = max(stat["max"], seconds)
+        if failed:
+            stat["errors"] += 1
+
+
+def _run(conn, name: str, params: tuple, fetch: bool):
+    sql = QUERIES[name]
+    for attempt in (1, 2):
+        cur = _cursor(conn, name)
+        start = time.perf_counter()
+        try:
+            cur.execute(sql, params)
+            rows = cur.fetchall() if fetch else None
+        except errors.Error as e:
+            _record(name, time.perf_counter() - start, failed=True)
+            # A failed statement may leave the cursor mid-result; prepare afresh next time.
+            _forget(conn, name)
+            if e.errno == ER_UNKNOWN_STMT_HANDLER and attempt == 1:
+                continue
+            raise
+        _record(name, time.perf_counter() - start)
+        return cur, rows
+
+
+def fetch_all(conn, name: str, params: tuple = ()) -> List[dict]:
+    return _run(conn, name, params, fetch=True)[1]
+
+
+def fetch_one(conn, name: str, params: tuple = ()) -> Optional[dict]:
+    rows = _run(conn, name, params, fetch=True)[1]
+    return rows[0] if rows else None
+
+
+def execute(conn, name: str, params: tuple = ()) -> int:
+    """Run a write statement; returns the affected row count."""
+    return _run(conn, name, params, fetch=False)[0].rowcount
+
+
+def insert(conn, name: str, params: tuple = ()) -> int:
+    """Run an INSERT; returns the new row's id."""
+    return _run(conn, name, params, fetch=False)[0].lastrowid
+
+
+def query_stats() -> dict:
+    """This process's per-statement counters, slowest total first."""
+    with _stats_lock:
+        statements = [
+            {
+                "name": name,
+                "calls": s["calls"],
+                "prepares": s["prepares"],
+                "errors": s["errors"],
+                "total_ms": round(s["total"] * 1000, 3),
+                "avg_ms": round(s["total"] * 1000 / s["calls"], 3) if s["calls"] else 0.0,
+                "max_ms": round(s["max"] * 1000, 3),
+            }
+            for name, s in _stats.items()
+        ]
+    statements.sort(key=lambda s: s["total_ms"], reverse=True)
+    return {"pid": os.getpid(), "statements": statements}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,269 @@
+# status_history.py
+
+"""
+Write-behind audit trail for lending request status transitions.
+
+Handlers call `record_transition(...)` after their own commit. The event is
+pushed onto a bounded in-process queue and a background thread batch-inserts
+it into `lending_status_history`, so approvals never wait on the audit write.
+
+Events that cannot be queued (queue full) or written (database error, or
+still queued at shutdown) are appended to a local spill file and replayed
+the next time a writer starts. A starting writer only claims spill files of
+processes that are no longer running, so a live sibling worker's file is never
+taken while it is being written. Every event carries a UUID `event_id` with a
+UNIQUE key, so replaying an event that did reach the database is a no-op.
+
+Each event remembers the school it belongs to and is written to that
+school's shard.
+"""
+
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import uuid
+from datetime import datetime
+from typing import Optional
+
+from database import get_connection
+from tenancy import DEFAULT_SCHOOL_ID, current_school, shard_for
+
+HISTORY_QUEUE_SIZE = int(os.getenv("HISTORY_QUEUE_SIZE", "10000"))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "200"))
+HISTORY_FLUSH_INTERVAL = float(os.getenv("HISTORY_FLUSH_INTERVAL", "0.5"))
+HISTORY_SPILL_DIR = os.getenv(
+    "HISTORY_SPILL_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "spill")
+)
+
+INSERT_QUERY = """
+    INSERT IGNORE INTO lending_status_history
+      (event_id, request_id, equipment_id, from_status, to_status, actor_id, changed_at, note)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+_STOP = object()
+
+# status_history-<pid>.jsonl, or .jsonl.replay-<pid> while a process replays it
+_SPILL_OWNER = re.compile(r"status_history-(\d+)\.jsonl(?:\.replay-(\d+))?$")
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill(pid, 0) would terminate the process on Windows
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x00100000, False, pid)  # SYNCHRONIZE
+        if not handle:
+            return False
+        try:
+            return kernel32.WaitForSingleObject(handle, 0) == 0x00000102  # WAIT_TIMEOUT: still running
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _event_params(event: dict) -> tuple:
+    return (
+        event["event_id"], event["request_id"], event["equipment_id"],
+        event["from_status"], event["to_status"], event["actor_id"],
+        event["changed_at"], event["note"],
+    )
+
+
+class StatusHistoryWriter:
+    """Bounded queue + background thread that batch-inserts history events."""
+
+    def __init__(self, spill_dir: str = HISTORY_SPILL_DIR, maxsize: int = HISTORY_QUEUE_SIZE,
+                 batch_size: int = HISTORY_BATCH_SIZE, flush_interval: float = HISTORY_FLUSH_INTERVAL):
+        self.spill_dir = spill_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._spill_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def spill_path(self) -> str:
+        # One spill file per process, so several workers never interleave writes.
+        return os.path.join(self.spill_dir, f"status_history-{os.getpid()}.jsonl")
+
+    # --- Lifecycle ---
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._replay_spill_files()
+        self._thread = threading.Thread(target=self._run, name="status-history-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush queued events to the database; anything left over is spilled."""
+        if not self._thread:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            self._spill(leftover)
+
+    # --- Producer side ---
+
+    def submit(self, event: dict):
+        """Never blocks the caller: a full queue spills to disk instead."""
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._spill([event])
+
+    # --- Consumer side ---
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if first is _STOP:
+                break
+
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+
+    def _write(self, batch: list):
+        by_shard = {}
+        unroutable = []
+        for event in batch:
+            school_id = event.get("school_id", DEFAULT_SCHOOL_ID)
+            try:
+                shard = shard_for(school_id)
+            except Exception as e:
+                # Kept on disk until the shard map knows the school again
+                print(f"No shard for status history event of school {school_id}, spilling: {e}")
+                unroutable.append(event)
+                continue
+            by_shard.setdefault(shard, (school_id, []))[1].append(event)
+        if unroutable:
+            self._spill(unroutable)
+
+        for school_id, events in by_shard.values():
+            conn = None
+            try:
+                conn = get_connection(school_id)
+                cur = conn.cursor()
+                cur.executemany(INSERT_QUERY, [_event_params(e) for e in events])
+                conn.commit()
+                cur.close()
+            except Exception as e:
+                print(f"Status history write failed, spilling {len(events)} event(s): {e}")
+                self._spill(events)
+            finally:
+                if conn:
+                    conn.close()
+
+    # --- Spill file ---
+
+    def _spill(self, events: list):
+        with self._spill_lock:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for event in events:
+                    f.write(json.dumps(event) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _claimable(self, path: str) -> bool:
+        """
+        A spill file can be replayed once the process that owns it has exited: the
+        worker that spilled it or, for a half-replayed file, the one replaying it.
+        Our own pid can only be on a file from an earlier process that had it.
+        """
+        match = _SPILL_OWNER.search(os.path.basename(path))
+        if not match:
+            return False
+        owner = int(match.group(2) or match.group(1))
+        return owner == os.getpid() or not _pid_alive(owner)
+
+    def _replay_spill_files(self):
+        """Claim the spill files of exited processes and write their events."""
+        pattern = os.path.join(self.spill_dir, "status_history-*.jsonl*")
+        for path in glob.glob(pattern):
+            if not self._claimable(path):
+                continue
+            base = path.split(".replay-")[0]
+            claimed = f"{base}.replay-{os.getpid()}"
+            try:
+                # Atomic rename: if another worker got there first, skip the file.
+                os.rename(path, claimed)
+            except OSError:
+                continue
+
+            events = []
+            with open(claimed, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        # A torn last line from a crash mid-write; the rest is still good.
+                        continue
+
+            for start in range(0, len(events), self.batch_size):
+                self._write(events[start:start + self.batch_size])
+            os.remove(claimed)
+
+
+history_writer = StatusHistoryWriter()
+
+
+def record_transition(request_id: int, equipment_id: Optional[int], from_status: Optional[str],
+                      to_status: str, actor_id: Optional[int], note: Optional[str] = None,
+                      school_id: Optional[int] = None):
+    """
+    Queue one status change for the audit trail. Call after the transition commits.
+    `school_id` defaults to the school of the request being served.
+    """
+    history_writer.submit({
+        "event_id": uuid.uuid4().hex,
+        "school_id": school_id if school_id is not None else current_school(),
+        "request_id": request_id,
+        "equipment_id": equipment_id,
+        "from_status": from_status,
+        "to_status": to_status,
+        "actor_id": actor_id,
+        "changed_at": datetime.now().isoformat(sep=" ", timespec="microseconds"),
+        "note": note,
+    })
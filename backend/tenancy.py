@@ -0,0 +1,186 @@
+# tenancy.py
+
+"""
+Multi-school tenancy: maps each school (the `school_id` JWT claim) to the
+database shard that holds its data, and tracks the school of the request
+being served.
+
+Shard map: the JSON file named by TENANT_SHARDS_FILE (default tenants.json
+next to this module), see tenants.example.json:
+
+    {
+      "shards":  {"north": {"host": "...", "port": 3306, "user": "...",
+                            "password": "...", "database": "lending_north"},
+                  "south": {...}},
+      "tenants": {"1": "north", "2": "south"},
+      "district_school": 1
+    }
+
+Each shard is one database holding the full schema for exactly one school:
+the tables have no school_id column, so the database is the isolation
+boundary and a map that puts two schools on one shard is refused. Without a
+shard map the app runs single-tenant: only DEFAULT_SCHOOL_ID exists and it
+uses the DB_* settings.
+
+District-wide endpoints read every shard, so they are limited to the Admins
+of the optional `district_school` (the district office); their tokens carry
+a `district` claim. In single-tenant mode the one school is the district.
+"""
+
+import contextvars
+import json
+import os
+from typing import Dict, List
+
+from dotenv import load_dotenv
+from jose import jwt, JWTError
+from starlette.responses import JSONResponse
+
+# Load environment variables before auth_utils reads SECRET_KEY
+load_dotenv()
+
+from auth_utils import SECRET_KEY, ALGORITHM  # noqa: E402
+
+DEFAULT_SCHOOL_ID = int(os.getenv("DEFAULT_SCHOOL_ID", "1"))
+TENANT_SHARDS_FILE = os.getenv(
+    "TENANT_SHARDS_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tenants.json")
+)
+DEFAULT_SHARD = "default"
+
+
+class UnknownTenant(Exception):
+    pass
+
+
+def _load_shard_map():
+    if not os.path.exists(TENANT_SHARDS_FILE):
+        shards = {DEFAULT_SHARD: {
+            "host": os.getenv("DB_HOST"),
+            "port": os.getenv("DB_PORT"),
+            "user": os.getenv("DB_USER"),
+            "password": os.getenv("DB_PASSWORD"),
+            "database": os.getenv("DB_NAME"),
+        }}
+        return shards, {}, None
+
+    with open(TENANT_SHARDS_FILE, encoding="utf-8") as f:
+        config = json.load(f)
+    shards = config["shards"]
+    tenants = {int(school_id): shard for school_id, shard in config["tenants"].items()}
+    shard_owner = {}
+    for school_id, shard in tenants.items():
+        if shard not in shards:
+            raise ValueError(f"School {school_id} maps to undefined shard '{shard}'")
+        if shard in shard_owner:
+            raise ValueError(
+                f"Schools {shard_owner[shard]} and {school_id} both map to shard '{shard}'; "
+                f"each school needs its own shard (the tables are not scoped by school)"
+            )
+        shard_owner[shard] = school_id
+    district_school = config.get("district_school")
+    if district_school is not None:
+        district_school = int(district_school)
+        if district_school not in tenants:
+            raise ValueError(f"District school {district_school} is not in the tenant map")
+    return shards, tenants, district_school
+
+
+_SHARDS, _TENANTS, _DISTRICT_SCHOOL = _load_shard_map()
+SINGLE_TENANT = not _TENANTS
+
+_current_school = contextvars.ContextVar("current_school", default=DEFAULT_SCHOOL_ID)
+
+
+# --- Lookups ---
+
+def shard_for(school_id: int) -> str:
+    if SINGLE_TENANT and school_id == DEFAULT_SCHOOL_ID:
+        return DEFAULT_SHARD
+    try:
+        return _TENANTS[school_id]
+    except KeyError:
+        raise UnknownTenant(f"Unknown school {school_id}")
+
+
+def is_known_school(school_id: int) -> bool:
+    return school_id == DEFAULT_SCHOOL_ID if SINGLE_TENANT else school_id in _TENANTS
+
+
+def is_district_school(school_id: int) -> bool:
+    """Whether the Admins of this school may use the district-wide (all shards) endpoints."""
+    if SINGLE_TENANT:
+        return school_id == DEFAULT_SCHOOL_ID
+    return _DISTRICT_SCHOOL is not None and school_id == _DISTRICT_SCHOOL
+
+
+def shard_config(shard: str) -> dict:
+    return _SHARDS[shard]
+
+
+def shard_names() -> List[str]:
+    return list(_SHARDS)
+
+
+def school_of_shard() -> Dict[str, int]:
+    """The one school stored on each shard."""
+    if SINGLE_TENANT:
+        return {DEFAULT_SHARD: DEFAULT_SCHOOL_ID}
+    return {shard: school_id for school_id, shard in _TENANTS.items()}
+
+
+# --- Current request's school ---
+
+def current_school() -> int:
+    return _current_school.get()
+
+
+def set_current_school(school_id: int):
+    """Returns a token for `reset_current_school`; used by jobs run outside a request."""
+    return _current_school.set(school_id)
+
+
+def reset_current_school(token):
+    _current_school.reset(token)
+
+
+class TenantMiddleware:
+    """
+    Sets the current school from the bearer token's `school_id` claim, so every
+    `get_connection()` in the request is routed to that school's shard.
+
+    Requests without a readable token (login, signup, docs) pass through with
+    the default school untouched: they name their school themselves or use no
+    database, and token validity is still enforced by `get_current_user`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        school_id = None
+        auth = dict(scope.get("headers") or []).get(b"authorization", b"").decode("latin-1")
+        if auth.lower().startswith("bearer ") and SECRET_KEY:
+            try:
+                payload = jwt.decode(auth[7:], SECRET_KEY, algorithms=[ALGORITHM])
+                school_id = int(payload.get("school_id", DEFAULT_SCHOOL_ID))
+            except (JWTError, TypeError, ValueError):
+                pass
+
+        if school_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not is_known_school(school_id):
+            response = JSONResponse({"detail": f"Unknown school {school_id}"}, status_code=403)
+            await response(scope, receive, send)
+            return
+
+        token = _current_school.set(school_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_school.reset(token)
@@ -0,0 +1,96 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from status_history import StatusHistoryWriter
+
+
+@pytest.fixture
+def live_pid():
+    """A process that is running for the duration of the test."""
+    proc = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    yield proc.pid
+    proc.kill()
+    proc.wait()
+
+
+@pytest.fixture
+def dead_pid():
+    """The pid of a process that has already exited."""
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    """A writer on a temporary spill dir whose database writes are recorded instead."""
+    w = StatusHistoryWriter(spill_dir=str(tmp_path), batch_size=2)
+    w.written = []
+    monkeypatch.setattr(w, "_write", lambda batch: w.written.extend(e["event_id"] for e in batch))
+    return w
+
+
+def _event(event_id):
+    return {"event_id": event_id, "school_id": 1, "request_id": 1, "equipment_id": 1,
+            "from_status": "Pending", "to_status": "Issued", "actor_id": 1,
+            "changed_at": "2025-01-01 00:00:00.000000", "note": None}
+
+
+def _spill_file(directory, name, event_ids, tail=""):
+    path = os.path.join(str(directory), name)
+    with open(path, "w", encoding="utf-8") as f:
+        for event_id in event_ids:
+            f.write(json.dumps(_event(event_id)) + "\n")
+        f.write(tail)
+    return path
+
+
+def test_replay_leaves_a_live_workers_spill_file_alone(writer, tmp_path, live_pid):
+    path = _spill_file(tmp_path, f"status_history-{live_pid}.jsonl", ["a"])
+
+    writer._replay_spill_files()
+
+    assert writer.written == []
+    assert os.path.exists(path)
+
+
+def test_replay_claims_and_removes_an_exited_workers_spill_file(writer, tmp_path, dead_pid):
+    _spill_file(tmp_path, f"status_history-{dead_pid}.jsonl", ["a", "b", "c"])
+
+    writer._replay_spill_files()
+
+    assert writer.written == ["a", "b", "c"]
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_half_replayed_file_belongs_to_the_replaying_process(writer, tmp_path, live_pid, dead_pid):
+    # Still being replayed by a live worker: left alone even though the spiller exited
+    busy = _spill_file(tmp_path, f"status_history-{dead_pid}.jsonl.replay-{live_pid}", ["a"])
+    # Its replayer died part way: claimable even though the spilling worker still runs
+    orphaned = _spill_file(tmp_path, f"status_history-{live_pid}.jsonl.replay-{dead_pid}", ["b"])
+
+    assert not writer._claimable(busy)
+    assert writer._claimable(orphaned)
+
+    writer._replay_spill_files()
+
+    assert writer.written == ["b"]
+    assert os.path.exists(busy)
+    assert not os.path.exists(orphaned)
+
+
+def test_replay_skips_a_torn_last_line(writer, tmp_path, dead_pid):
+    _spill_file(tmp_path, f"status_history-{dead_pid}.jsonl", ["a", "b"], tail='{"event_id": "c", "sch')
+
+    writer._replay_spill_files()
+
+    assert writer.written == ["a", "b"]
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_unrelated_files_are_not_claimed(writer, tmp_path):
+    assert not writer._claimable(os.path.join(str(tmp_path), "notes.jsonl"))
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import tenancy
+
+SHARD = {"host": "localhost", "port": 3306, "user": "root", "password": "", "database": "lending"}
+
+
+@pytest.fixture
+def shard_map(tmp_path, monkeypatch):
+    """Write a shard map and point the loader at it."""
+    path = tmp_path / "tenants.json"
+    monkeypatch.setattr(tenancy, "TENANT_SHARDS_FILE", str(path))
+
+    def write(config):
+        path.write_text(json.dumps(config), encoding="utf-8")
+    return write
+
+
+def test_loads_one_school_per_shard(shard_map):
+    shard_map({"shards": {"north": SHARD, "south": SHARD}, "tenants": {"1": "north", "2": "south"},
+               "district_school": 1})
+
+    shards, tenants, district_school = tenancy._load_shard_map()
+
+    assert set(shards) == {"north", "south"}
+    assert tenants == {1: "north", 2: "south"}
+    assert district_school == 1
+
+
+def test_rejects_a_school_on_an_undefined_shard(shard_map):
+    shard_map({"shards": {"north": SHARD}, "tenants": {"1": "north", "2": "south"}})
+
+    with pytest.raises(ValueError, match="undefined shard 'south'"):
+        tenancy._load_shard_map()
+
+
+def test_rejects_two_schools_on_one_shard(shard_map):
+    shard_map({"shards": {"north": SHARD}, "tenants": {"1": "north", "3": "north"}})
+
+    with pytest.raises(ValueError, match="both map to shard 'north'"):
+        tenancy._load_shard_map()
+
+
+def test_rejects_a_district_school_outside_the_map(shard_map):
+    shard_map({"shards": {"north": SHARD}, "tenants": {"1": "north"}, "district_school": 9})
+
+    with pytest.raises(ValueError, match="District school 9"):
+        tenancy._load_shard_map()
+
+
+def test_without_a_map_runs_single_tenant(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenancy, "TENANT_SHARDS_FILE", str(tmp_path / "missing.json"))
+
+    shards, tenants, district_school = tenancy._load_shard_map()
+
+    assert list(shards) == [tenancy.DEFAULT_SHARD]
+    assert tenants == {}
+    assert district_school is None
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import waitlist
+from waitlist import plan_allocation
+
+
+# --- plan_allocation ---
+
+def _c(request_id, quantity):
+    return {"request_id": request_id, "quantity": quantity}
+
+
+def test_plan_takes_candidates_in_order_while_they_fit():
+    assert plan_allocation([_c(1, 2), _c(2, 1), _c(3, 1)], 3) == [_c(1, 2), _c(2, 1)]
+
+
+def test_plan_skips_a_request_too_large_for_the_remaining_budget():
+    assert plan_allocation([_c(1, 2), _c(2, 3), _c(3, 1)], 3) == [_c(1, 2), _c(3, 1)]
+
+
+def test_plan_stops_once_the_budget_is_used_up():
+    candidates = [_c(1, 1)] + [_c(i, 1) for i in range(2, 10000)]
+    assert plan_allocation(candidates, 1) == [_c(1, 1)]
+
+
+def test_plan_with_no_budget_allocates_nothing():
+    assert plan_allocation([_c(1, 1)], 0) == []
+
+
+# --- allocate(), against an in-memory stand-in for the registered statements ---
+
+class FakeShard:
+    """Executes the waitlist's registered statements on in-memory rows."""
+
+    def __init__(self, available):
+        self.available = dict(available)
+        self.requests = {}
+        self.candidate_queries = []
+        self.commits = 0
+        self._next_id = 1
+        self._start = datetime(2025, 1, 1)
+
+    def add(self, equipment_id, quantity, status="Waitlisted", priority=0):
+        request_id = self._next_id
+        self._next_id += 1
+        self.requests[request_id] = {
+            "request_id": request_id, "equipment_id": equipment_id, "quantity": quantity,
+            "status": status, "priority": priority, "request_date": self._start + timedelta(minutes=request_id),
+        }
+        return request_id
+
+    def status(self, request_id):
+        return self.requests[request_id]["status"]
+
+    # queries.fetch_one / fetch_all / execute
+    def fetch_all(self, conn, name, params=()):
+        if name == "waitlist.lock_equipment":
+            (equipment_id,) = params
+            if equipment_id not in self.available:
+                return []
+            return [{"available_quantity": self.available[equipment_id], "total_quantity": 100}]
+        if name == "waitlist.pending_units":
+            (equipment_id,) = params
+            return [{"pending": sum(r["quantity"] for r in self.requests.values()
+                                    if r["equipment_id"] == equipment_id and r["status"] == "Pending")}]
+        if name == "waitlist.candidates":
+            equipment_id, budget, limit = params
+            self.candidate_queries.append((equipment_id, budget, limit))
+            rows = [r for r in self.requests.values()
+                    if r["equipment_id"] == equipment_id and r["status"] == "Waitlisted" and r["quantity"] <= budget]
+            rows.sort(key=lambda r: (-r["priority"], r["request_date"], r["request_id"]))
+            return [{"request_id": r["request_id"], "quantity": r["quantity"]} for r in rows[:limit]]
+        raise AssertionError(f"unexpected statement {name}")
+
+    def fetch_one(self, conn, name, params=()):
+        rows = self.fetch_all(conn, name, params)
+        return rows[0] if rows else None
+
+    def execute(self, conn, name, params=()):
+        assert name == "waitlist.promote"
+        request = self.requests[params[0]]
+        assert request["status"] == "Waitlisted"
+        request["status"] = "Pending"
+        return 1
+
+    # connection
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def shard(monkeypatch):
+    fake = FakeShard({1: 0, 2: 0})
+    monkeypatch.setattr(waitlist.queries, "fetch_one", fake.fetch_one)
+    monkeypatch.setattr(waitlist.queries, "fetch_all", fake.fetch_all)
+    monkeypatch.setattr(waitlist.queries, "execute", fake.execute)
+    monkeypatch.setattr(waitlist, "get_connection", lambda school_id=None: fake)
+    fake.transitions = []
+    monkeypatch.setattr(waitlist, "record_transition",
+                        lambda request_id, *args, **kwargs: fake.transitions.append(request_id))
+    return fake
+
+
+def test_allocate_serves_priority_then_fifo(shard):
+    first = shard.add(1, 1)
+    second = shard.add(1, 1)
+    staff = shard.add(1, 1, priority=1)
+    shard.available[1] = 2
+
+    assert waitlist.allocate([1], school_id=1) == [staff, first]
+    assert shard.status(second) == "Waitlisted"
+    assert shard.transitions == [staff, first]
+
+
+def test_allocate_budget_excludes_units_reserved_by_pending_requests(shard):
+    shard.add(1, 2, status="Pending")
+    waiting = shard.add(1, 2)
+    shard.available[1] = 3
+
+    assert waitlist.allocate([1], school_id=1) == []
+    assert shard.status(waiting) == "Waitlisted"
+
+
+def test_allocate_fills_smaller_requests_behind_one_that_does_not_fit(shard):
+    big = shard.add(1, 5)
+    small = shard.add(1, 1)
+    shard.available[1] = 3
+
+    assert waitlist.allocate([1], school_id=1) == [small]
+    assert shard.status(big) == "Waitlisted"
+
+
+def test_starved_allocation_reads_no_candidates_beyond_the_filter(shard):
+    for _ in range(20000):
+        shard.add(1, 2)
+    shard.available[1] = 1
+
+    assert waitlist.allocate([1], school_id=1) == []
+    # One bounded query; the 2-unit requests are filtered out by quantity <= 1
+    assert shard.candidate_queries == [(1, 1, 1)]
+
+
+def test_allocate_requeries_after_the_limit_with_the_smaller_budget(shard):
+    a = shard.add(1, 2)
+    shard.add(1, 2)
+    shard.add(1, 2)
+    d = shard.add(1, 1)
+    shard.available[1] = 3
+
+    # Round 1 sees a, b, c (LIMIT 3) and takes a; round 2 only asks for 1-unit requests
+    assert waitlist.allocate([1], school_id=1) == [a, d]
+    assert shard.candidate_queries == [(1, 3, 3), (1, 1, 1)]
+
+
+def test_allocate_ignores_rejected_and_unknown_equipment(shard):
+    rejected = shard.add(1, 1, status="Rejected")
+    shard.available[1] = 5
+
+    assert waitlist.allocate([1, 99], school_id=1) == []
+    assert shard.status(rejected) == "Rejected"
+    assert shard.commits == 1
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from database import get_connection
+import queries
 from auth_utils import get_password_hash, verify_password, create_access_token
 from models import UserCreate, LoginRequest, Token
+from tenancy import DEFAULT_SCHOOL_ID, is_known_school, is_district_school
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -11,21 +13,21 @@ def signup(user: UserCreate):
     """
     Public signup route — allows new users (student, staff, admin) to register.
     """
+    school_id = user.school_id if user.school_id is not None else DEFAULT_SCHOOL_ID
+    if not is_known_school(school_id):
+        raise HTTPException(status_code=400, detail="Unknown school")
+
     try:
-        conn = get_connection()
-        cur = conn.cursor(dictionary=True)
+        conn = get_connection(school_id)
 
         # Check if username already exists
-        cur.execute("SELECT user_id FROM users WHERE username = %s", (user.username,))
-        if cur.fetchone():
+        if queries.fetch_one(conn, "user.id_by_username", (user.username,)):
             raise HTTPException(status_code=400, detail="Username already exists")
 
         hashed_pw = get_password_hash(user.password)
 
-        cur.execute("""
-            INSERT INTO users (username, password_hash, full_name, email, phone_number, role)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """, (user.username, hashed_pw, user.full_name, user.email, user.phone, user.role))
+        queries.insert(conn, "user.insert",
+                       (user.username, hashed_pw, user.full_name, user.email, user.phone, user.role))
 
         conn.commit()
         return {"message": f"User '{user.username}' created successfully!"}
@@ -35,7 +37,6 @@ def signup(user: UserCreate):
         raise HTTPException(status_code=500, detail="Internal server error")
 
     finally:
-        cur.close()
         conn.close()
 
 
@@ -44,16 +45,16 @@ def signup(user: UserCreate):
 def login(form_data: LoginRequest):
     """
     Handles user login and returns a JWT token.
+    The user is looked up in their school's database; the school goes into the token.
     """
+    school_id = form_data.school_id if form_data.school_id is not None else DEFAULT_SCHOOL_ID
+    if not is_known_school(school_id):
+        raise HTTPException(status_code=400, detail="Unknown school")
+
     try:
-        conn = get_connection()
-        cur = conn.cursor(dictionary=True)
+        conn = get_connection(school_id)
 
-        cur.execute(
-            "SELECT user_id, username, password_hash, role, full_name FROM users WHERE username = %s",
-            (form_data.username,),
-        )
-        user = cur.fetchone()
+        user = queries.fetch_one(conn, "user.login_by_username", (form_data.username,))
 
         if not user or not verify_password(form_data.password, user["password_hash"]):
             raise HTTPException(
@@ -62,7 +63,10 @@ def login(form_data: LoginRequest):
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
-        token = create_access_token(data={"user_id": user["user_id"], "role": user["role"]})
+        # Only the district office's Admins may read other schools (district analytics)
+        district = user["role"] == "Admin" and is_district_school(school_id)
+        token = create_access_token(data={"user_id": user["user_id"], "role": user["role"],
+                                          "school_id": school_id, "district": district})
 
         return {
             "access_token": token,
@@ -70,6 +74,7 @@ def login(form_data: LoginRequest):
             "user_id": user["user_id"],
             "role": user["role"],
             "full_name": user["full_name"],
+            "school_id": school_id,
         }
 
     except Exception as e:
@@ -77,5 +82,4 @@ def login(form_data: LoginRequest):
         raise HTTPException(status_code=500, detail="Internal server error")
 
     finally:
-        cur.close()
         conn.close()
@@ -0,0 +1,155 @@
+# waitlist.py
+
+"""
+Waitlist and allocation engine for requests that could not be filled.
+
+A request for more units than are free is stored as 'Waitlisted' instead of
+being refused. The waitlist is the `lending_requests` rows themselves, served
+in priority order (higher priority first, then FIFO by request date). When
+units are freed (return, rejection, restock, admin edit, or a new request
+joining a non-empty line), `allocate()` promotes as many waiting requests as
+fit to 'Pending' in one transaction, so they go through the normal approval
+flow.
+
+Free units = available_quantity minus the units already asked for by Pending
+requests (`locked_stock`). New requests and the allocator both use it, so a
+promoted request can actually be approved.
+
+There is no per-process queue: every decision reads the database with the
+equipment row locked FOR UPDATE, so all workers see the same line and never
+double-allocate.
+"""
+
+from typing import List, Optional
+
+import queries
+from database import get_connection
+from status_history import record_transition
+from tenancy import current_school
+
+# Higher number is served first; FIFO within the same priority.
+WAITLIST_PRIORITY = {"Admin": 1, "Staff": 1, "Student": 0}
+
+queries.register("waitlist.lock_equipment",
+                 "SELECT available_quantity, total_quantity FROM equipment WHERE equipment_id = %s FOR UPDATE")
+queries.register("waitlist.pending_units", """
+    SELECT COALESCE(SUM(quantity), 0) AS pending
+    FROM lending_requests WHERE equipment_id = %s AND status = 'Pending'
+""")
+queries.register("waitlist.has_waiting",
+                 "SELECT 1 AS waiting FROM lending_requests WHERE equipment_id = %s AND status = 'Waitlisted' LIMIT 1")
+# Queue order, served by idx_lr_waitlist. `quantity <= budget` leaves out requests that cannot fit;
+# LIMIT budget: every request needs at least one unit, so no more than that can be allocated.
+queries.register("waitlist.candidates", """
+    SELECT request_id, quantity
+    FROM lending_requests
+    WHERE equipment_id = %s AND status = 'Waitlisted' AND quantity <= %s
+    ORDER BY priority DESC, request_date, request_id
+    LIMIT %s
+    FOR UPDATE
+""")
+queries.register("waitlist.promote",
+                 "UPDATE lending_requests SET status = 'Pending' WHERE request_id = %s AND status = 'Waitlisted'")
+
+
+def priority_for(role: str) -> int:
+    return WAITLIST_PRIORITY.get(role, 0)
+
+
+def locked_stock(conn, equipment_id: int) -> Optional[dict]:
+    """
+    Lock the equipment row and return its quantities plus `free_units` (None if it
+    does not exist). The lock is held until the caller's transaction ends.
+    """
+    stock = queries.fetch_one(conn, "waitlist.lock_equipment", (equipment_id,))
+    if not stock:
+        return None
+    pending = queries.fetch_one(conn, "waitlist.pending_units", (equipment_id,))
+    stock["free_units"] = stock["available_quantity"] - int(pending["pending"])
+    return stock
+
+
+def has_waiting(conn, equipment_id: int) -> bool:
+    return queries.fetch_one(conn, "waitlist.has_waiting", (equipment_id,)) is not None
+
+
+def plan_allocation(candidates: List[dict], budget: int) -> List[dict]:
+    """
+    Pick the candidates that fit into `budget` units, in the given (priority/FIFO) order.
+
+    A candidate larger than the remaining budget is skipped so smaller requests
+    behind it can still be filled. Stops as soon as the budget is used up.
+    """
+    allocated = []
+    for candidate in candidates:
+        if budget <= 0:
+            break
+        if candidate["quantity"] <= budget:
+            allocated.append(candidate)
+            budget -= candidate["quantity"]
+    return allocated
+
+
+def _allocate_one(conn, equipment_id: int) -> List[int]:
+    stock = locked_stock(conn, equipment_id)
+    budget = stock["free_units"] if stock else 0
+    promoted = []
+    while budget > 0:
+        limit = budget
+        candidates = queries.fetch_all(conn, "waitlist.candidates", (equipment_id, budget, limit))
+        # The first candidate always fits, so each round promotes at least one request.
+        for candidate in plan_allocation(candidates, budget):
+            queries.execute(conn, "waitlist.promote", (candidate["request_id"],))
+            promoted.append(candidate["request_id"])
+            budget -= candidate["quantity"]
+        if len(candidates) < limit:
+            # Every request that could fit was considered.
+            break
+        # Otherwise more may be queued past the LIMIT. Requests skipped in this round are
+        # larger than the (now smaller) budget and drop out of the next query's filter.
+    return promoted
+
+
+def allocate(equipment_ids: List[int], actor_id: Optional[int] = None,
+             school_id: Optional[int] = None) -> List[int]:
+    """
+    Promote as many waiting requests as fit to 'Pending'; returns their request ids.
+    Equipment rows are locked in id order, so concurrent allocations cannot deadlock.
+    Borrows its own connection: callers release theirs first, or a few concurrent
+    callers can exhaust the worker's pool waiting for a second slot.
+    """
+    school_id = school_id if school_id is not None else current_school()
+    equipment_ids = sorted(set(equipment_ids))
+    if not equipment_ids:
+        return []
+
+    promoted = {}
+    conn = None
+    try:
+        conn = get_connection(school_id)
+        conn.start_transaction()
+        for equipment_id in equipment_ids:
+            for request_id in _allocate_one(conn, equipment_id):
+                promoted[request_id] = equipment_id
+        conn.commit()
+    except Exception:
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            conn.close()
+
+    for request_id, equipment_id in promoted.items():
+        record_transition(request_id, equipment_id, "Waitlisted", "Pending", actor_id,
+                          "Allocated from waitlist", school_id=school_id)
+    return list(promoted)
+
+
+def allocate_quietly(equipment_ids: List[int], actor_id: Optional[int] = None) -> List[int]:
+    """Allocation triggered as a side effect of another action must not fail that action."""
+    try:
+        return allocate(equipment_ids, actor_id)
+    except Exception as e:
+        print(f"Waitlist allocation failed for equipment {equipment_ids}: {e}")
+        return []
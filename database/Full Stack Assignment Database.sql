@@ -29,7 +29,9 @@ CREATE TABLE EQUIPMENT (
     category_id INT NOT NULL,
     total_quantity INT NOT NULL DEFAULT 0,
     available_quantity INT NOT NULL DEFAULT 0,
-    FOREIGN KEY (category_id) REFERENCES EQUIPMENT_CATEGORY(category_id)
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    FOREIGN KEY (category_id) REFERENCES EQUIPMENT_CATEGORY(category_id),
+    INDEX idx_equipment_updated_at (updated_at)
 );
 
 -- Table 4: LENDING_REQUESTS (Core table for borrowing/tracking)
@@ -42,12 +44,21 @@ CREATE TABLE LENDING_REQUESTS (
     expected_return_date DATE NOT NULL,
     return_date DATE,
     quantity INT NOT NULL,
-    status ENUM('Pending', 'Approved', 'Issued', 'Rejected', 'Returned') NOT NULL,
+    status ENUM('Waitlisted', 'Pending', 'Approved', 'Issued', 'Rejected', 'Returned') NOT NULL,
+    priority INT NOT NULL DEFAULT 0,
     approver_id INT,
     rejection_reason TEXT,
+    updated_at DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
     FOREIGN KEY (equipment_id) REFERENCES EQUIPMENT(equipment_id),
     FOREIGN KEY (requester_id) REFERENCES USERS(user_id),
-    FOREIGN KEY (approver_id) REFERENCES USERS(user_id)
+    FOREIGN KEY (approver_id) REFERENCES USERS(user_id),
+    INDEX idx_lr_equipment_status (equipment_id, status),
+    INDEX idx_lr_status_date (status, request_date),
+    INDEX idx_lr_status_return (status, expected_return_date),
+    INDEX idx_lr_requester_status (requester_id, status, expected_return_date),
+    -- Waitlist per equipment in queue order (waitlist.py)
+    INDEX idx_lr_waitlist (equipment_id, status, priority DESC, request_date, request_id, quantity),
+    INDEX idx_lr_updated_at (updated_at)
 );
 
 -- Table 5: REPAIR_LOG (Handles Damage/Repair Maintenance)
@@ -64,6 +75,28 @@ CREATE TABLE REPAIR_LOG (
     FOREIGN KEY (reported_by_user_id) REFERENCES USERS(user_id)
 );
 
+-- Table 6: LENDING_STATUS_HISTORY (Append-only audit trail of request status changes)
+-- Written in batches by backend/status_history.py; event_id makes spill-file replays idempotent.
+CREATE TABLE LENDING_STATUS_HISTORY (
+    history_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    event_id CHAR(32) NOT NULL UNIQUE,
+    request_id INT NOT NULL,
+    equipment_id INT,
+    from_status VARCHAR(20),
+    to_status VARCHAR(20) NOT NULL,
+    actor_id INT,
+    changed_at DATETIME(6) NOT NULL,
+    note TEXT,
+    INDEX idx_lsh_request (request_id, changed_at),
+    INDEX idx_lsh_equipment (equipment_id, changed_at)
+);
+
+-- Table 7: JOB_WATERMARKS (Last successful run of incremental background jobs)
+CREATE TABLE JOB_WATERMARKS (
+    job_name VARCHAR(64) PRIMARY KEY,
+    watermark DATETIME(6) NOT NULL
+);
+
 -- Insert Sample Users
 INSERT INTO USERS (username, password_hash, full_name, role, email) VALUES
 ('admin01', 'hash_admin123', 'John Doe', 'Admin', 'john.doe@school.edu'), -- user_id 1
@@ -14,6 +14,7 @@ export async function apiCall<T = unknown>(
   method: 'GET' | 'POST' | 'PUT' | 'DELETE',
   data?: unknown,
   token?: string | null,
+  signal?: AbortSignal,
 ): Promise<T> {
   const headers: HeadersInit = {
     'Content-Type': 'application/json',
@@ -27,6 +28,7 @@ export async function apiCall<T = unknown>(
     method,
     headers,
     body: data ? JSON.stringify(data) : undefined,
+    signal,
   };
 
   try {
@@ -59,7 +61,10 @@ export async function apiCall<T = unknown>(
 
     return response.json() as Promise<T>;
   } catch (error) {
-    console.error('API Call Error:', error);
+    // A superseded request aborted by the query layer is expected, not an error worth logging
+    if ((error as Error)?.name !== 'AbortError') {
+      console.error('API Call Error:', error);
+    }
     // Re-throw to be handled by calling component
     throw error;
   }
@@ -0,0 +1,144 @@
+import { query, mutate, invalidate, clearQueryCache, getQueryStats, resourceOf } from './queryClient';
+
+/**
+ * fetch is mocked: each call returns a promise the test resolves by hand,
+ * so in-flight overlap can be controlled precisely.
+ */
+
+type Pending = { url: string; signal?: AbortSignal; resolve: (body: unknown) => void };
+let pending: Pending[] = [];
+
+const jsonResponse = (body: unknown) => ({
+  ok: true,
+  status: 200,
+  headers: { get: () => 'application/json' },
+  json: () => Promise.resolve(body),
+});
+
+beforeEach(() => {
+  pending = [];
+  clearQueryCache();
+  (global as any).fetch = jest.fn((url: string, config: RequestInit) =>
+    new Promise((resolve, reject) => {
+      config.signal?.addEventListener('abort', () => {
+        const err = new Error('aborted');
+        err.name = 'AbortError';
+        reject(err);
+      });
+      pending.push({ url, signal: config.signal ?? undefined, resolve: (body) => resolve(jsonResponse(body)) });
+    }),
+  );
+});
+
+const flush = () => new Promise((r) => setTimeout(r, 0));
+
+describe('queryClient', () => {
+  test('derives the resource from the first path segment', () => {
+    expect(resourceOf('/lending/requests?status=Pending')).toBe('lending');
+    expect(resourceOf('/equipment/?search_term=cam')).toBe('equipment');
+    expect(resourceOf('/equipment')).toBe('equipment');
+  });
+
+  test('deduplicates identical in-flight GETs', async () => {
+    const a = query('/equipment', 'tok');
+    const b = query('/equipment', 'tok');
+    expect(fetch).toHaveBeenCalledTimes(1);
+    pending[0].resolve([{ equipment_id: 1 }]);
+    await expect(a).resolves.toEqual([{ equipment_id: 1 }]);
+    await expect(b).resolves.toEqual([{ equipment_id: 1 }]);
+    expect(getQueryStats().deduped).toBe(1);
+  });
+
+  test('does not share responses between tokens', () => {
+    query('/equipment', 'tok-a');
+    query('/equipment', 'tok-b');
+    expect(fetch).toHaveBeenCalledTimes(2);
+  });
+
+  test('serves fresh responses from cache', async () => {
+    const first = query('/equipment', 'tok');
+    pending[0].resolve(['cached']);
+    await first;
+    await expect(query('/equipment', 'tok')).resolves.toEqual(['cached']);
+    expect(fetch).toHaveBeenCalledTimes(1);
+  });
+
+  test('serves stale responses and revalidates in the background', async () => {
+    const first = query('/equipment', 'tok', { staleTime: 0 });
+    pending[0].resolve(['old']);
+    await first;
+
+    const onRevalidate = jest.fn();
+    await expect(query('/equipment', 'tok', { staleTime: 0, onRevalidate })).resolves.toEqual(['old']);
+    expect(fetch).toHaveBeenCalledTimes(2);
+    pending[1].resolve(['new']);
+    await flush();
+    expect(onRevalidate).toHaveBeenCalledWith(['new']);
+  });
+
+  test('aborts the superseded request on the same channel', async () => {
+    const first = query('/equipment/?search_term=c', 'tok', { channel: 'search' });
+    query('/equipment/?search_term=ca', 'tok', { channel: 'search' });
+    expect(pending[0].signal?.aborted).toBe(true);
+    await expect(first).rejects.toHaveProperty('name', 'AbortError');
+    expect(getQueryStats().aborted).toBe(1);
+  });
+
+  test('mutations invalidate cached reads of the listed resources', async () => {
+    const reqs = query('/lending/requests', 'tok');
+    const equip = query('/equipment', 'tok');
+    pending[0].resolve([]);
+    pending[1].resolve([]);
+    await Promise.all([reqs, equip]);
+
+    const done = mutate('/lending/approve/1', 'POST', undefined, 'tok', ['lending']);
+    pending[2].resolve({ message: 'ok' });
+    await done;
+
+    query('/lending/requests', 'tok');
+    query('/equipment', 'tok');
+    // lending was refetched, equipment still came from cache
+    expect(fetch).toHaveBeenCalledTimes(4);
+    expect(pending[3].url).toContain('/lending/requests');
+  });
+
+  test('a response that was in flight during invalidation is not cached', async () => {
+    const stale = query('/lending/requests', 'tok');
+    invalidate(['lending']);
+    pending[0].resolve(['before mutation']);
+    await stale;
+
+    query('/lending/requests', 'tok');
+    expect(fetch).toHaveBeenCalledTimes(2);
+  });
+
+  test('expired entries are swept when a new response is cached', async () => {
+    const now = jest.spyOn(Date, 'now').mockReturnValue(1000);
+    const first = query('/equipment/?search_term=a', 'tok', { cacheTime: 500 });
+    pending[0].resolve([]);
+    await first;
+    expect(getQueryStats().cached).toBe(1);
+
+    now.mockReturnValue(2000);
+    const second = query('/equipment/?search_term=b', 'tok');
+    pending[1].resolve([]);
+    await second;
+    expect(getQueryStats().cached).toBe(1);
+    now.mockRestore();
+  });
+
+  test('the cache is capped, evicting the oldest responses', async () => {
+    for (let i = 0; i < 105; i += 1) {
+      const p = query(`/equipment/?search_term=${i}`, 'tok');
+      pending[i].resolve([i]);
+      await p;
+    }
+    expect(getQueryStats().cached).toBe(100);
+
+    // The newest is still served from cache, the oldest is refetched
+    query('/equipment/?search_term=104', 'tok');
+    expect(fetch).toHaveBeenCalledTimes(105);
+    query('/equipment/?search_term=0', 'tok');
+    expect(fetch).toHaveBeenCalledTimes(106);
+  });
+});
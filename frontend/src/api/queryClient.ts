@@ -0,0 +1,200 @@
+// src/api/queryClient.ts
+import { apiCall } from './apiClient';
+
+/**
+ * Client-side query layer on top of apiCall for GET requests:
+ *  - identical in-flight GETs (same URL + token) share one fetch
+ *  - responses are cached; fresh ones are served without a request, stale ones
+ *    are served immediately and revalidated in the background
+ *  - requests on the same `channel` supersede each other (the older one is aborted)
+ *  - mutations invalidate cached reads by resource name
+ */
+
+const DEFAULT_STALE_TIME = 5000; // ms a response is served without revalidating
+const DEFAULT_CACHE_TIME = 60000; // ms a stale response may still be served while revalidating
+const MAX_CACHE_ENTRIES = 100; // oldest responses are evicted beyond this (e.g. many distinct search URLs)
+
+export interface QueryOptions<T> {
+  staleTime?: number;
+  cacheTime?: number;
+  // Resources the response depends on; defaults to the URL's first path segment ('/lending/...' -> 'lending')
+  resources?: string[];
+  // Starting a request on a channel aborts that channel's previous in-flight request for a different URL
+  channel?: string;
+  // Bypass the cache (an identical in-flight request is still shared)
+  force?: boolean;
+  // Receives the new data when a stale response was served and revalidation completes
+  onRevalidate?: (data: T) => void;
+}
+
+interface CacheEntry {
+  data: unknown;
+  fetchedAt: number;
+  cacheTime: number;
+  resources: string[];
+}
+
+interface InFlightEntry {
+  promise: Promise<unknown>;
+  controller: AbortController;
+  resources: string[];
+  invalidated: boolean;
+}
+
+const cache = new Map<string, CacheEntry>();
+const inFlight = new Map<string, InFlightEntry>();
+const channels = new Map<string, string>();
+const stats = { network: 0, cacheHits: 0, deduped: 0, aborted: 0 };
+
+export function resourceOf(url: string): string {
+  return url.replace(/^\//, '').split(/[/?]/)[0];
+}
+
+function keyFor(url: string, token?: string | null): string {
+  return `${token ?? ''} ${url}`;
+}
+
+function overlaps(a: string[], b: string[]): boolean {
+  return a.some((r) => b.indexOf(r) !== -1);
+}
+
+function supersede(channel: string, key: string) {
+  const previousKey = channels.get(channel);
+  channels.set(channel, key);
+  if (!previousKey || previousKey === key) return;
+  const previous = inFlight.get(previousKey);
+  if (previous) {
+    previous.controller.abort();
+    inFlight.delete(previousKey);
+    stats.aborted += 1;
+  }
+}
+
+/**
+ * Store a response, dropping expired entries and, past MAX_CACHE_ENTRIES, the oldest ones.
+ * The Map keeps insertion order, and entries are re-inserted on refresh, so it is ordered by fetchedAt.
+ */
+function store(key: string, entry: CacheEntry) {
+  cache.delete(key);
+  const now = Date.now();
+  cache.forEach((existing, existingKey) => {
+    if (now - existing.fetchedAt >= existing.cacheTime) cache.delete(existingKey);
+  });
+  cache.set(key, entry);
+  const excess = cache.size - MAX_CACHE_ENTRIES;
+  if (excess > 0) {
+    Array.from(cache.keys()).slice(0, excess).forEach((oldKey) => cache.delete(oldKey));
+  }
+}
+
+function startFetch<T>(
+  key: string,
+  url: string,
+  token: string | null | undefined,
+  resources: string[],
+  cacheTime: number,
+): Promise<T> {
+  const existing = inFlight.get(key);
+  if (existing) {
+    stats.deduped += 1;
+    return existing.promise as Promise<T>;
+  }
+
+  const controller = new AbortController();
+  const entry: InFlightEntry = { promise: Promise.resolve(), controller, resources, invalidated: false };
+  entry.promise = apiCall<T>(url, 'GET', undefined, token, controller.signal)
+    .then((data) => {
+      // A mutation that landed while this was in flight makes the response unsafe to cache
+      if (!entry.invalidated) {
+        store(key, { data, fetchedAt: Date.now(), cacheTime, resources });
+      }
+      return data;
+    })
+    .finally(() => {
+      if (inFlight.get(key) === entry) inFlight.delete(key);
+    });
+  inFlight.set(key, entry);
+  stats.network += 1;
+  return entry.promise as Promise<T>;
+}
+
+export function query<T = unknown>(url: string, token?: string | null, options: QueryOptions<T> = {}): Promise<T> {
+  const {
+    staleTime = DEFAULT_STALE_TIME,
+    cacheTime = DEFAULT_CACHE_TIME,
+    resources = [resourceOf(url)],
+    channel,
+    force = false,
+    onRevalidate,
+  } = options;
+  const key = keyFor(url, token);
+
+  if (channel) supersede(channel, key);
+
+  const cached = cache.get(key);
+  if (cached && !force) {
+    const age = Date.now() - cached.fetchedAt;
+    if (age < staleTime) {
+      stats.cacheHits += 1;
+      return Promise.resolve(cached.data as T);
+    }
+    if (age < cacheTime) {
+      stats.cacheHits += 1;
+      startFetch<T>(key, url, token, resources, cacheTime)
+        .then((data) => onRevalidate?.(data))
+        .catch(() => {
+          // Keep serving the stale data; the next query retries
+        });
+      return Promise.resolve(cached.data as T);
+    }
+    cache.delete(key);
+  }
+
+  return startFetch<T>(key, url, token, resources, cacheTime);
+}
+
+export function invalidate(resources: string[]) {
+  cache.forEach((entry, key) => {
+    if (overlaps(entry.resources, resources)) cache.delete(key);
+  });
+  inFlight.forEach((entry, key) => {
+    if (overlaps(entry.resources, resources)) {
+      entry.invalidated = true;
+      inFlight.delete(key);
+    }
+  });
+}
+
+export async function mutate<T = unknown>(
+  url: string,
+  method: 'POST' | 'PUT' | 'DELETE',
+  data?: unknown,
+  token?: string | null,
+  invalidates: string[] = [resourceOf(url)],
+): Promise<T> {
+  try {
+    return await apiCall<T>(url, method, data, token);
+  } finally {
+    // Invalidate even when the mutation fails: a rejection usually means the cached view was already stale
+    invalidate(invalidates);
+  }
+}
+
+export function isAbortError(error: unknown): boolean {
+  return (error as Error)?.name === 'AbortError';
+}
+
+export function getQueryStats() {
+  return { ...stats, cached: cache.size };
+}
+
+export function clearQueryCache() {
+  inFlight.forEach((entry) => entry.controller.abort());
+  cache.clear();
+  inFlight.clear();
+  channels.clear();
+  stats.network = 0;
+  stats.cacheHits = 0;
+  stats.deduped = 0;
+  stats.aborted = 0;
+}
@@ -1,6 +1,7 @@
 // src/context/AuthContext.tsx
 import React, { createContext, useContext, useState, useEffect, ReactNode } from 'react';
 import { RoleType } from '../types/models';
+import { clearQueryCache } from '../api/queryClient';
 
 // 1. Define the Context's shape
 interface AuthContextType {
@@ -59,6 +60,7 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
     setUserRole(null);
     setUserId(null);
     setFullName(null);
+    clearQueryCache();
     // localStorage cleanup handled by useEffect
   };
 
@@ -1,21 +1,35 @@
 import React, { useEffect, useState } from 'react';
 import { useAuth } from '../context/AuthContext';
-import { apiCall } from '../api/apiClient';
-import { Equipment } from '../types/models';
+import { query, isAbortError } from '../api/queryClient';
+import { AdminDashboardData, EquipmentWithCategory, StatusCounts } from '../types/models';
 import { Loader2 } from 'lucide-react';
 import Notification from '../components/Notification';
 
 export default function AdminDashboard() {
   const { token, fullName, logout, userRole } = useAuth();
-  const [equipment, setEquipment] = useState<Equipment[]>([]);
+  const [equipment, setEquipment] = useState<EquipmentWithCategory[]>([]);
+  const [counts, setCounts] = useState<StatusCounts | null>(null);
+  const [overdueCount, setOverdueCount] = useState(0);
   const [loading, setLoading] = useState(false);
   const [notification, setNotification] = useState<{ message: string; type: 'success' | 'error' } | null>(null);
 
-  const fetchEquipment = async () => {
+  const applyDashboard = (data: AdminDashboardData) => {
+    setEquipment(data.equipment || []);
+    setCounts(data.counts);
+    setOverdueCount(data.overdue_count);
+  };
+
+  const fetchDashboard = async (force = false) => {
     try {
-      const data = await apiCall<Equipment[]>('/equipment', 'GET', undefined, token);
-      setEquipment(data || []);
+      const data = await query<AdminDashboardData>('/dashboard/admin', token, {
+        force,
+        resources: ['lending', 'equipment'],
+        channel: 'admin-dashboard',
+        onRevalidate: applyDashboard,
+      });
+      applyDashboard(data);
     } catch (err) {
+      if (isAbortError(err)) return;
       console.error('equipment fetch', err);
       setNotification({ message: 'Failed to load equipment', type: 'error' });
     }
@@ -23,7 +37,7 @@ export default function AdminDashboard() {
 
   useEffect(() => {
     setLoading(true);
-    fetchEquipment().finally(() => setLoading(false));
+    fetchDashboard().finally(() => setLoading(false));
   }, []);
 
   return (
@@ -43,6 +57,15 @@ export default function AdminDashboard() {
       )}
 
       <section>
+        {counts && (
+          <div className="bg-white p-4 mb-4 rounded-xl shadow-sm flex gap-6 text-sm text-gray-600">
+            <span>Pending: <span className="font-medium">{counts.Pending}</span></span>
+            <span>Issued: <span className="font-medium">{counts.Issued}</span></span>
+            <span>Returned: <span className="font-medium">{counts.Returned}</span></span>
+            <span>Rejected: <span className="font-medium">{counts.Rejected}</span></span>
+            <span className={overdueCount > 0 ? 'text-red-600' : ''}>Overdue: <span className="font-medium">{overdueCount}</span></span>
+          </div>
+        )}
         <div className="bg-white p-6 rounded-xl shadow-sm">
           <h2 className="text-xl font-semibold mb-4">Equipment Inventory</h2>
 
@@ -59,9 +82,7 @@ export default function AdminDashboard() {
                   <div>
                     <div className="font-semibold">{e.name}</div>
                     <div className="text-sm text-gray-500">
-                      {e.category_id !== undefined && e.category_id !== null
-                        ? `Category ID: ${e.category_id}`
-                        : 'Category: General'}
+                      {e.category_name ? `Category: ${e.category_name}` : 'Category: General'}
                     </div>
                   </div>
 
@@ -82,7 +103,7 @@ export default function AdminDashboard() {
         <button
           onClick={() => {
             setLoading(true);
-            fetchEquipment().finally(() => setLoading(false));
+            fetchDashboard(true).finally(() => setLoading(false));
           }}
           className="px-4 py-2 bg-gray-200 rounded"
         >
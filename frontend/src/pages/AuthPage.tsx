@@ -27,6 +27,7 @@ const AuthPage: React.FC = () => {
     email: '',
     phone_number: '',
     role: 'student' as RoleType, // Default role for signup
+    school_id: '', // Optional: blank uses the server's default school
   });
   const [notification, setNotification] = useState<{ message: string; type: 'success' | 'error' } | null>(null);
   const [isLoading, setIsLoading] = useState(false);
@@ -41,15 +42,17 @@ const AuthPage: React.FC = () => {
     setNotification(null);
 
     const endpoint = isLoginView ? '/users/login' : '/users/signup';
+    const schoolId = formData.school_id ? parseInt(formData.school_id, 10) : undefined;
     const data = isLoginView
-      ? { username: formData.username, password: formData.password }
+      ? { username: formData.username, password: formData.password, school_id: schoolId }
       : { 
           username: formData.username, 
           password: formData.password, 
           full_name: formData.full_name, 
           email: formData.email, 
           phone_number: formData.phone_number,
-          role: formData.role
+          role: formData.role,
+          school_id: schoolId
         };
 
     try {
@@ -62,7 +65,7 @@ const AuthPage: React.FC = () => {
           setAuth(authData.access_token, authData.role, authData.user_id, authData.full_name);
           setNotification({ message: `Login successful! Welcome, ${authData.full_name}.`, type: 'success' });
           // Clear form data on success
-          setFormData({ username: '', password: '', full_name: '', email: '', phone_number: '', role: 'Student' });
+          setFormData({ username: '', password: '', full_name: '', email: '', phone_number: '', role: 'Student', school_id: formData.school_id });
         } else {
           throw new Error("Invalid response from login API.");
         }
@@ -70,7 +73,7 @@ const AuthPage: React.FC = () => {
         // Signup success (Admin-only), which returns a success message
         setNotification({ message: 'User created successfully! You can now log in.', type: 'success' });
         setIsLoginView(true); // Switch to login view after successful signup
-        setFormData({ username: '', password: '', full_name: '', email: '', phone_number: '', role: 'Student' });
+        setFormData({ username: '', password: '', full_name: '', email: '', phone_number: '', role: 'Student', school_id: formData.school_id });
       }
 
     } catch (error) {
@@ -119,6 +122,20 @@ const AuthPage: React.FC = () => {
       )}
 
       <form onSubmit={handleAuth} className="space-y-6">
+        {/* School (optional for both; routes to that school's data) */}
+        <div>
+          <label htmlFor="school_id" className="block text-sm font-medium text-gray-700">School ID (optional)</label>
+          <input
+            id="school_id"
+            name="school_id"
+            type="number"
+            min="1"
+            onChange={handleChange}
+            value={formData.school_id}
+            className="mt-1 block w-full px-3 py-2 border border-gray-300 rounded-md shadow-sm placeholder-gray-400 focus:outline-none focus:ring-blue-500 focus:border-blue-500"
+          />
+        </div>
+
         {/* Username and Password (Required for both) */}
         <div>
           <label htmlFor="username" className="block text-sm font-medium text-gray-700">Username</label>
@@ -1,16 +1,17 @@
 // src/pages/StaffDashboard.tsx
 import React, { useEffect, useState } from 'react';
 import { useAuth } from '../context/AuthContext';
-import { apiCall } from '../api/apiClient';
-import { LendingRequest, Equipment } from '../types/models';
+import { query, mutate, isAbortError } from '../api/queryClient';
+import { DashboardRequest, StaffDashboardData, StatusCounts } from '../types/models';
 import { Loader2, Check, X, Archive } from 'lucide-react';
 import Notification from '../components/Notification';
 
 export default function StaffDashboard() {
   const { token, fullName, logout, userRole } = useAuth();
   const [loading, setLoading] = useState(false);
-  const [requests, setRequests] = useState<LendingRequest[]>([]);
-  const [equipmentMap, setEquipmentMap] = useState<Record<number, Equipment>>({});
+  const [requests, setRequests] = useState<DashboardRequest[]>([]);
+  const [counts, setCounts] = useState<StatusCounts | null>(null);
+  const [overdueCount, setOverdueCount] = useState(0);
   const [notification, setNotification] = useState<{ message: string; type: 'success' | 'error' } | null>(null);
 
   // reject modal state
@@ -19,21 +20,25 @@ export default function StaffDashboard() {
   const [rejectReason, setRejectReason] = useState<string>('');
   const [submittingReject, setSubmittingReject] = useState(false);
 
-  // fetch pending/active lending requests
-  const fetchRequests = async () => {
+  const applyDashboard = (data: StaffDashboardData) => {
+    setRequests(data.requests || []);
+    setCounts(data.counts);
+    setOverdueCount(data.overdue_count);
+  };
+
+  // one round trip: open requests pre-joined with equipment/borrower names, plus counts
+  const fetchDashboard = async (force = false) => {
     setLoading(true);
     try {
-      // Try an explicit "requests" endpoint first
-      let data = null;
-      try {
-        data = await apiCall<LendingRequest[]>('/lending/requests?status=Pending', 'GET', undefined, token);
-      } catch (err) {
-        // fallback: fetch all lending requests
-        data = await apiCall<LendingRequest[]>('/lending', 'GET', undefined, token);
-      }
-      const filtered = (data || []).filter((r) => r.status === 'Pending' || r.status === 'Approved' || r.status === 'Issued');
-      setRequests(filtered);
+      const data = await query<StaffDashboardData>('/dashboard/staff', token, {
+        force,
+        resources: ['lending', 'equipment'],
+        channel: 'staff-dashboard',
+        onRevalidate: applyDashboard,
+      });
+      applyDashboard(data);
     } catch (err: any) {
+      if (isAbortError(err)) return;
       console.error(err);
       setNotification({ message: 'Could not load requests', type: 'error' });
     } finally {
@@ -41,31 +46,17 @@ export default function StaffDashboard() {
     }
   };
 
-  // fetch equipment list for quick lookup
-  const fetchEquipment = async () => {
-    try {
-      const equipment = await apiCall<Equipment[]>('/equipment', 'GET', undefined, token);
-      const map: Record<number, Equipment> = {};
-      equipment.forEach((e) => (map[e.equipment_id] = e));
-      setEquipmentMap(map);
-    } catch (err) {
-      console.warn('Equipment fetch failed', err);
-    }
-  };
-
   useEffect(() => {
-    fetchRequests();
-    fetchEquipment();
+    fetchDashboard();
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, []);
 
   const approveRequest = async (requestId: number) => {
     setLoading(true);
     try {
-      await apiCall(`/lending/approve/${requestId}`, 'POST', undefined, token);
+      await mutate(`/lending/approve/${requestId}`, 'POST', undefined, token, ['lending', 'equipment']);
       setNotification({ message: `Request #${requestId} approved`, type: 'success' });
-      await fetchRequests();
-      await fetchEquipment();
+      await fetchDashboard();
     } catch (err: any) {
       console.error(err);
       setNotification({ message: `Approve failed: ${err?.payload?.detail || err?.message || 'server error'}`, type: 'error' });
@@ -84,11 +75,11 @@ export default function StaffDashboard() {
     if (!activeRejectId) return;
     setSubmittingReject(true);
     try {
-      await apiCall(`/lending/reject/${activeRejectId}`, 'POST', { reason: rejectReason }, token);
+      await mutate(`/lending/reject/${activeRejectId}`, 'POST', { reason: rejectReason }, token, ['lending', 'equipment']);
       setNotification({ message: `Request #${activeRejectId} rejected`, type: 'success' });
       setShowRejectModal(false);
       setActiveRejectId(null);
-      await fetchRequests();
+      await fetchDashboard();
     } catch (err: any) {
       console.error('reject error', err);
       setNotification({ message: `Reject failed: ${err?.payload?.detail || err?.message || 'server error'}`, type: 'error' });
@@ -105,10 +96,9 @@ export default function StaffDashboard() {
   const markReturned = async (requestId: number) => {
     setLoading(true);
     try {
-      await apiCall(`/lending/return/${requestId}`, 'POST', undefined, token);
+      await mutate(`/lending/return/${requestId}`, 'POST', undefined, token, ['lending', 'equipment']);
       setNotification({ message: `Request #${requestId} marked returned`, type: 'success' });
-      await fetchRequests();
-      await fetchEquipment();
+      await fetchDashboard();
     } catch (err: any) {
       console.error(err);
       setNotification({ message: `Return failed: ${err?.payload?.detail || err?.message || 'server error'}`, type: 'error' });
@@ -132,7 +122,15 @@ export default function StaffDashboard() {
       )}
 
       <section className="bg-white p-6 rounded-xl shadow-sm">
-        <h2 className="text-xl font-semibold mb-4">Pending / Active Requests</h2>
+        <h2 className="text-xl font-semibold mb-4">Waitlisted / Pending / Active Requests</h2>
+        {counts && (
+          <div className="flex gap-4 mb-4 text-sm text-gray-600">
+            <span>Waitlisted: <span className="font-medium">{counts.Waitlisted}</span></span>
+            <span>Pending: <span className="font-medium">{counts.Pending}</span></span>
+            <span>Issued: <span className="font-medium">{counts.Issued}</span></span>
+            <span className={overdueCount > 0 ? 'text-red-600' : ''}>Overdue: <span className="font-medium">{overdueCount}</span></span>
+          </div>
+        )}
 
         {loading ? (
           <div className="flex items-center gap-2 text-gray-500"><Loader2 className="animate-spin" /> Loading...</div>
@@ -141,44 +139,47 @@ export default function StaffDashboard() {
         ) : (
           <div className="grid gap-4">
             {requests.map((r) => {
-              const equip = equipmentMap[r.equipment_id];
               return (
                 <div key={r.request_id} className="p-4 border rounded-lg flex items-start justify-between">
                   <div>
                     <div className="text-lg font-semibold">
-                      {equip ? equip.name : `Equipment #${r.equipment_id}`}
+                      {r.equipment_name || `Equipment #${r.equipment_id}`}
                       <span className="ml-2 text-sm text-gray-500">x{r.quantity}</span>
                     </div>
                     <div className="text-sm text-gray-600 mt-1">
-                      Requested by: <span className="capitalize">{(r as any).requester_name || 'Unknown'}</span> • Requested on: {r.request_date}
+                      Requested by: <span className="capitalize">{r.requester_name || 'Unknown'}</span> • Requested on: {r.request_date}
                     </div>
                     <div className="text-sm text-gray-600">Status: <span className="font-medium">{r.status}</span></div>
                     {/* Show reject reason when present */}
-                    {(r as any).reject_reason && (
+                    {r.is_overdue && (
+                      <div className="text-sm text-red-600">Overdue since {r.expected_return_date}</div>
+                    )}
+                    {r.rejection_reason && (
                       <div className="mt-2 text-sm text-red-600">
-                        Rejection reason: {(r as any).reject_reason}
+                        Rejection reason: {r.rejection_reason}
                       </div>
                     )}
                   </div>
 
                   <div className="flex flex-col items-end space-y-2">
                     {r.status === 'Pending' && (
-                      <>
-                        <button
-                          onClick={() => approveRequest(r.request_id)}
-                          disabled={loading}
-                          className="flex items-center gap-2 px-3 py-2 bg-green-600 text-white rounded hover:bg-green-700"
-                        >
-                          <Check className="h-4 w-4" /> Approve
-                        </button>
-                        <button
-                          onClick={() => rejectRequest(r.request_id)}
-                          disabled={loading}
-                          className="flex items-center gap-2 px-3 py-2 bg-red-600 text-white rounded hover:bg-red-700"
-                        >
-                          <X className="h-4 w-4" /> Reject
-                        </button>
-                      </>
+                      <button
+                        onClick={() => approveRequest(r.request_id)}
+                        disabled={loading}
+                        className="flex items-center gap-2 px-3 py-2 bg-green-600 text-white rounded hover:bg-green-700"
+                      >
+                        <Check className="h-4 w-4" /> Approve
+                      </button>
+                    )}
+                    {/* Waitlisted requests cannot be approved until promoted, but can be turned down */}
+                    {(r.status === 'Pending' || r.status === 'Waitlisted') && (
+                      <button
+                        onClick={() => rejectRequest(r.request_id)}
+                        disabled={loading}
+                        className="flex items-center gap-2 px-3 py-2 bg-red-600 text-white rounded hover:bg-red-700"
+                      >
+                        <X className="h-4 w-4" /> Reject
+                      </button>
                     )}
 
                     {r.status === 'Approved' || r.status === 'Issued' ? (
@@ -199,7 +200,7 @@ export default function StaffDashboard() {
       </section>
 
       <div className="mt-6 flex justify-between">
-        <button onClick={fetchRequests} className="px-4 py-2 bg-gray-200 rounded">Refresh</button>
+        <button onClick={() => fetchDashboard(true)} className="px-4 py-2 bg-gray-200 rounded">Refresh</button>
         <button onClick={logout} className="px-4 py-2 bg-red-600 text-white rounded">Logout</button>
       </div>
 
@@ -1,8 +1,8 @@
 // src/pages/StudentStaffDashboard.tsx
 import React, { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '../context/AuthContext';
-import { apiCall } from '../api/apiClient';
-import { Equipment, LendingRequestCreate } from '../types/models'; // Import Equipment and LendingRequestCreate
+import { query, mutate, isAbortError } from '../api/queryClient';
+import { DashboardRequest, EquipmentWithCategory, LendingRequestCreate, LendingRequestDB, StatusCounts, StudentDashboardData } from '../types/models';
 import { Search, Loader2, ArrowRight } from 'lucide-react';
 import Notification from '../components/Notification'; // Assuming this component exists
 
@@ -15,7 +15,10 @@ interface StudentStaffDashboardProps {
 const StudentStaffDashboard: React.FC<StudentStaffDashboardProps> = ({ setAppError, setAppSuccess }) => {
   const { token, userRole } = useAuth();
   const [loading, setLoading] = useState(false);
-  const [equipmentList, setEquipmentList] = useState<Equipment[]>([]);
+  const [equipmentList, setEquipmentList] = useState<EquipmentWithCategory[]>([]);
+  const [myRequests, setMyRequests] = useState<DashboardRequest[]>([]);
+  const [counts, setCounts] = useState<StatusCounts | null>(null);
+  const [overdueCount, setOverdueCount] = useState(0);
   const [searchTerm, setSearchTerm] = useState('');
   const [categoryFilter, setCategoryFilter] = useState('');
   const [loanModal, setLoanModal] = useState<{ isOpen: boolean; equipmentId: number | null; equipmentName: string | null; quantity: number; returnDate: string }>({
@@ -29,28 +32,42 @@ const StudentStaffDashboard: React.FC<StudentStaffDashboardProps> = ({ setAppErr
   const [notification, setNotification] = useState<{ message: string; type: 'success' | 'error' } | null>(null);
 
 
+  const applyDashboard = useCallback((data: StudentDashboardData) => {
+    setEquipmentList(data.equipment || []);
+    setMyRequests(data.requests || []);
+    setCounts(data.counts);
+    setOverdueCount(data.overdue_count);
+  }, []);
+
+  // one round trip: borrowable equipment (filtered) plus the user's own requests and counts
   const fetchEquipment = useCallback(async () => {
     if (!token) return;
     setLoading(true);
     setAppError(null);
     
     try {
-      const query = new URLSearchParams();
-      if (searchTerm) query.append('search_term', searchTerm);
-      if (categoryFilter) query.append('category_id', categoryFilter);
+      const params = new URLSearchParams();
+      if (searchTerm) params.append('search_term', searchTerm);
+      if (categoryFilter) params.append('category_id', categoryFilter);
 
-      const url = `/equipment/?${query.toString()}`;
+      const url = `/dashboard/student?${params.toString()}`;
       
-      const data = await apiCall<Equipment[]>(url, 'GET', undefined, token);
-      setEquipmentList(data);
+      // Typing in the search box supersedes (aborts) the previous search still in flight
+      const data = await query<StudentDashboardData>(url, token, {
+        resources: ['lending', 'equipment'],
+        channel: 'student-dashboard',
+        onRevalidate: applyDashboard,
+      });
+      applyDashboard(data);
       
     } catch (error) {
+      if (isAbortError(error)) return;
       const errorMessage = (error as any)?.message || 'Failed to fetch equipment.';
       setAppError(errorMessage);
     } finally {
       setLoading(false);
     }
-  }, [token, searchTerm, categoryFilter, setAppError]);
+  }, [token, searchTerm, categoryFilter, setAppError, applyDashboard]);
 
   useEffect(() => {
     fetchEquipment();
@@ -80,11 +97,15 @@ const StudentStaffDashboard: React.FC<StudentStaffDashboardProps> = ({ setAppErr
 
     try {
       // API call to POST /lending/request (Accessible by Student/Staff)
-      await apiCall('/lending/request', 'POST', requestData, token);
+      const created = await mutate<LendingRequestDB>('/lending/request', 'POST', requestData, token, ['lending', 'equipment']);
       
-      setNotification({ message: 'Loan request submitted successfully! Pending approval.', type: 'success' });
+      // Not enough units free right now: the request waits in line and is promoted automatically
+      const message = created?.status === 'Waitlisted'
+        ? 'Not enough units available right now. You have been added to the waitlist.'
+        : 'Loan request submitted successfully! Pending approval.';
+      setNotification({ message, type: 'success' });
       setLoanModal({ ...loanModal, isOpen: false });
-      setAppSuccess('Loan request submitted successfully! Pending approval.');
+      setAppSuccess(message);
       fetchEquipment(); // Refresh list to update available quantity
     } catch (error) {
       const errorMessage = (error as any)?.message || 'Failed to submit loan request.';
@@ -105,6 +126,33 @@ const StudentStaffDashboard: React.FC<StudentStaffDashboardProps> = ({ setAppErr
         <Notification message={notification.message} type={notification.type} onClose={() => setNotification(null)} />
       )}
 
+      {/* My Requests */}
+      {myRequests.length > 0 && (
+        <div className="mb-8 bg-white p-4 rounded-lg shadow-sm">
+          <div className="flex gap-4 mb-3 text-sm text-gray-600">
+            <span className="font-semibold text-gray-900">My Requests</span>
+            {counts && (
+              <>
+                <span>Waitlisted: <span className="font-medium">{counts.Waitlisted}</span></span>
+                <span>Pending: <span className="font-medium">{counts.Pending}</span></span>
+                <span>Issued: <span className="font-medium">{counts.Issued}</span></span>
+              </>
+            )}
+            <span className={overdueCount > 0 ? 'text-red-600' : ''}>Overdue: <span className="font-medium">{overdueCount}</span></span>
+          </div>
+          <ul className="divide-y divide-gray-100">
+            {myRequests.map((r) => (
+              <li key={r.request_id} className="py-2 flex justify-between text-sm">
+                <span>{r.equipment_name} <span className="text-gray-500">x{r.quantity}</span></span>
+                <span className={r.is_overdue ? 'text-red-600 font-medium' : 'text-gray-600'}>
+                  {r.is_overdue ? `Overdue (due ${r.expected_return_date})` : r.status}
+                </span>
+              </li>
+            ))}
+          </ul>
+        </div>
+      )}
+
       {/* Search and Filter Bar */}
       <div className="flex space-x-4 mb-8 bg-gray-50 p-4 rounded-lg shadow-sm">
         <div className="relative flex-grow">
@@ -153,20 +201,21 @@ const StudentStaffDashboard: React.FC<StudentStaffDashboardProps> = ({ setAppErr
               {equipmentList.map(item => (
                   <div key={item.equipment_id} className="bg-white p-6 rounded-xl shadow-lg border border-gray-200 space-y-3 transition transform hover:shadow-xl">
                       <h3 className="text-xl font-bold text-gray-900">{item.name}</h3>
-                      <p className="text-sm text-gray-500">Category ID: {item.category_id}</p>
+                      <p className="text-sm text-gray-500">Category: {item.category_name}</p>
                       <div className="flex justify-between items-center pt-2 border-t border-gray-100">
                           <p className={`text-lg font-semibold ${item.available_quantity > 0 ? 'text-green-600' : 'text-red-600'}`}>
                               Available: {item.available_quantity} / {item.total_quantity}
                           </p>
+                          {/* Out of stock: the request joins the waitlist and is promoted when units free up */}
                           <button
                               onClick={() => handleRequestLoan(item.equipment_id, item.name)}
-                              disabled={item.available_quantity <= 0 || loading}
-                              className="px-4 py-2 bg-blue-500 text-white text-sm font-medium rounded-lg hover:bg-blue-600 transition duration-150 disabled:bg-gray-400 disabled:cursor-not-allowed flex items-center"
+                              disabled={loading}
+                              className={`px-4 py-2 text-white text-sm font-medium rounded-lg transition duration-150 disabled:bg-gray-400 disabled:cursor-not-allowed flex items-center ${item.available_quantity > 0 ? 'bg-blue-500 hover:bg-blue-600' : 'bg-amber-500 hover:bg-amber-600'}`}
                           >
                               {item.available_quantity > 0 ? (
                                 <>Borrow Item <ArrowRight className='w-4 h-4 ml-1'/></>
                                 ) : (
-                                'Out of Stock'
+                                'Join Waitlist'
                               )}
                           </button>
                       </div>
@@ -183,11 +232,12 @@ const StudentStaffDashboard: React.FC<StudentStaffDashboardProps> = ({ setAppErr
             <form onSubmit={submitLoanRequest} className="space-y-4">
               <div>
                 <label htmlFor="quantity" className="block text-sm font-medium text-gray-700">Quantity</label>
+                {/* Capped at the total, not the free units: a larger request is waitlisted */}
                 <input
                   id="quantity"
                   type="number"
                   min="1"
-                  max={equipmentList.find(e => e.equipment_id === loanModal.equipmentId)?.available_quantity || 1}
+                  max={equipmentList.find(e => e.equipment_id === loanModal.equipmentId)?.total_quantity || 1}
                   value={loanModal.quantity}
                   onChange={(e) => setLoanModal({ ...loanModal, quantity: parseInt(e.target.value) })}
                   className="mt-1 block w-full px-3 py-2 border border-gray-300 rounded-md"
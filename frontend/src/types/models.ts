@@ -8,6 +8,7 @@ export interface AuthResponse {
   role: RoleType;
   user_id: number;
   full_name: string;
+  school_id: number;
 }
 
 // Matches EquipmentDB from equipment_api.py
@@ -27,7 +28,7 @@ export interface LendingRequestDB {
   request_date: string; // YYYY-MM-DD
   expected_return_date: string; // YYYY-MM-DD
   quantity: number;
-  status: 'Pending' | 'Approved' | 'Issued' | 'Returned' | 'Rejected';
+  status: 'Waitlisted' | 'Pending' | 'Approved' | 'Issued' | 'Returned' | 'Rejected';
   // Other fields...
 }
 
@@ -36,6 +37,43 @@ export interface LendingRequest extends LendingRequestDB {
   equipment_name?: string;
 }
 
+// Matches EquipmentWithCategory from dashboard_api.py
+export interface EquipmentWithCategory extends Equipment {
+  category_name: string;
+}
+
+// Matches DashboardRequest from dashboard_api.py (pre-joined names)
+export interface DashboardRequest extends LendingRequestDB {
+  equipment_name: string;
+  requester_name: string;
+  borrow_date?: string | null;
+  rejection_reason?: string | null;
+  is_overdue: boolean;
+}
+
+export type StatusCounts = Record<LendingRequestDB['status'], number>;
+
+interface DashboardSummary {
+  counts: StatusCounts;
+  overdue_count: number;
+}
+
+// GET /dashboard/staff
+export interface StaffDashboardData extends DashboardSummary {
+  requests: DashboardRequest[];
+}
+
+// GET /dashboard/student
+export interface StudentDashboardData extends DashboardSummary {
+  equipment: EquipmentWithCategory[];
+  requests: DashboardRequest[];
+}
+
+// GET /dashboard/admin
+export interface AdminDashboardData extends DashboardSummary {
+  equipment: EquipmentWithCategory[];
+}
+
 // Data model for POST /lending/request
 export interface LendingRequestCreate {
     equipment_id: number;